@@ -0,0 +1,102 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.settings import COUNT_POST_ON_PAGE
+
+USER = 'Vlad0n4uk'
+FOLLOWER = 'follower'
+SLUG = 'slugtest'
+COUNT_POSTS = COUNT_POST_ON_PAGE + 3
+INDEX_URL = reverse('api:index')
+GROUP_URL = reverse('api:group_list', args=[SLUG])
+PROFILE_URL = reverse('api:profile', args=[USER])
+FOLLOW_INDEX_URL = reverse('api:follow_index')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug=SLUG, description='Описание'
+        )
+        Post.objects.bulk_create(Post(
+            author=cls.user,
+            group=cls.group,
+            text=f'Тестовый пост {number}',
+        ) for number in range(COUNT_POSTS))
+        cls.post = Post.objects.create(
+            author=cls.user, text='Последний пост', image='posts/small.gif'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        cls.guest = Client()
+        cls.auth_follower = Client()
+        cls.auth_follower.force_login(cls.follower)
+
+    def collect(self, client, url):
+        seen = []
+        while url:
+            data = client.get(url).json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+        return seen
+
+    def test_feeds_match_html_order(self):
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        cases = [
+            (self.guest, INDEX_URL, expected),
+            (self.guest, GROUP_URL, expected[1:]),
+            (self.guest, PROFILE_URL, expected),
+            (self.auth_follower, FOLLOW_INDEX_URL, expected),
+        ]
+        for client, url, posts in cases:
+            with self.subTest(address=url):
+                self.assertEqual(self.collect(client, url), posts)
+
+    def test_feed_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.guest.get(INDEX_URL)
+        self.assertEqual(len(response.json()['results']), COUNT_POST_ON_PAGE)
+
+    def test_sparse_fields(self):
+        data = self.guest.get(INDEX_URL, {'fields': 'id,image'}).json()
+        self.assertEqual(data['results'][0], {
+            'id': self.post.pk, 'image': '/media/posts/small.gif'
+        })
+        self.assertEqual(
+            self.guest.get(INDEX_URL, {'fields': 'password'}).status_code,
+            400
+        )
+
+    def test_post_detail_and_comments(self):
+        data = self.guest.get(
+            reverse('api:post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(data['author'], USER)
+        self.assertIsNone(data['group'])
+        comments = self.guest.get(
+            reverse('api:post_comments', args=[self.post.pk])
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in comments['results']],
+            ['Комментарий']
+        )
+
+    def test_errors_are_json(self):
+        urls = [
+            (self.guest, FOLLOW_INDEX_URL, 401),
+            (self.guest, reverse('api:group_list', args=['missing']), 404),
+            (self.guest, reverse('api:post_detail', args=[0]), 404),
+        ]
+        for client, url, status in urls:
+            with self.subTest(address=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
@@ -0,0 +1,127 @@
+"""
+JSON API лент только для чтения.
+
+Строки сериализуются прямо из values(), без экземпляров моделей
+и шаблонов. Ленты листаются курсором, как и HTML-страницы,
+параметр fields= оставляет в ответе только нужные поля.
+"""
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+
+from posts.models import Comment, Group, Post, User
+from posts.paginator import CursorPaginator
+from posts.settings import (COUNT_COMMENTS_ON_PAGE, COUNT_POST_ON_PAGE,
+                            FEED_KEYS)
+
+# Поле ответа -> путь в values()
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'post': 'post_id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+}
+
+
+def error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def requested_fields(request, available):
+    """Поля из fields= или все; None, если среди них есть неизвестные."""
+    fields = request.GET.get('fields')
+    if fields is None:
+        return list(available)
+    fields = [field for field in map(str.strip, fields.split(',')) if field]
+    if not fields or not set(fields) <= set(available):
+        return None
+    return fields
+
+
+def serialize(row, fields, available):
+    data = {field: row[available[field]] for field in fields}
+    if 'image' in data:
+        data['image'] = data['image'] and default_storage.url(data['image'])
+    return data
+
+
+def page_link(request, cursor):
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'?{params.urlencode()}')
+
+
+def feed(request, queryset, available=POST_FIELDS, keys=None,
+         per_page=COUNT_POST_ON_PAGE):
+    fields = requested_fields(request, available)
+    if fields is None:
+        return error(f'Доступные поля: {", ".join(available)}', 400)
+    keys = tuple(keys or CursorPaginator.keys)
+    rows = queryset.values(
+        *{available[field] for field in fields}.union(keys)
+    )
+    page = CursorPaginator(rows, per_page, keys=keys).get_cursor_page(
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'results': [serialize(row, fields, available) for row in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    })
+
+
+def index(request):
+    return feed(request, Post.objects.all())
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return error('Группа не найдена', 404)
+    return feed(request, Post.objects.filter(group_id=group_id))
+
+
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return error('Автор не найден', 404)
+    return feed(request, Post.objects.filter(author_id=author_id))
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация', 401)
+    return feed(request, Post.objects.timeline(request.user), keys=FEED_KEYS)
+
+
+def post_detail(request, post_id):
+    fields = requested_fields(request, POST_FIELDS)
+    if fields is None:
+        return error(f'Доступные поля: {", ".join(POST_FIELDS)}', 400)
+    row = Post.objects.filter(pk=post_id).values(
+        *{POST_FIELDS[field] for field in fields}
+    ).first()
+    if row is None:
+        return error('Пост не найден', 404)
+    return JsonResponse(serialize(row, fields, POST_FIELDS))
+
+
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден', 404)
+    return feed(
+        request, Comment.objects.filter(post_id=post_id), COMMENT_FIELDS,
+        per_page=COUNT_COMMENTS_ON_PAGE
+    )
@@ -0,0 +1,82 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from . import profiling
+from .models import Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    """Профили запросов видны и скачиваются только суперпользователями."""
+    list_display = (
+        'view_name',
+        'kind',
+        'duration',
+        'method',
+        'path',
+        'created',
+        'download'
+    )
+    list_filter = ('kind', 'view_name')
+    search_fields = ('view_name', 'path')
+    fields = (
+        'view_name', 'kind', 'duration', 'method', 'path', 'created',
+        'download', 'summary'
+    )
+    readonly_fields = fields
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        # Данные профилей тяжелые, в списке они не нужны
+        return super().get_queryset(request).defer('data')
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_profile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        profile = get_object_or_404(Profile, pk=pk)
+        response = HttpResponse(
+            bytes(profile.data), content_type='application/octet-stream'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile.filename}"'
+        )
+        return response
+
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse('admin:core_profile_download', args=(obj.pk,)),
+            obj.filename
+        )
+    download.short_description = 'Файл'
+
+    def summary(self, obj):
+        return format_html('<pre>{}</pre>', profiling.summary(obj))
+    summary.short_description = 'Сводка'
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_finished
+        from django.db.backends.signals import connection_created
+
+        from . import db, timing
+        timing.install()
+        connection_created.connect(db.apply_pragmas)
+        request_finished.connect(db.maintain_periodically)
@@ -0,0 +1,166 @@
+"""
+Замеры страниц posts, users и about: перцентили задержки и число
+запросов к БД. Страницы запрашиваются тестовым клиентом в этом же
+процессе, так что в замер входят middleware, view и шаблоны,
+но не сеть и не WSGI-сервер.
+"""
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Group, Post, User
+
+
+def targets():
+    """Страницы для замера: (имя, адрес, пользователь или None).
+
+    Берутся самые тяжелые объекты: группа и автор с наибольшим числом
+    постов, пост с наибольшим числом комментариев.
+    """
+    author = User.objects.filter(
+        pk=AuthorStats.objects.order_by('-posts_count').values('user')[:1]
+    ).first() or User.objects.first()
+    follower = User.objects.filter(
+        pk=AuthorStats.objects.order_by('-following_count').values(
+            'user')[:1]
+    ).first() or author
+    group = Group.objects.annotate(
+        size=Count('posts')).order_by('-size').first()
+    post = Post.objects.annotate(
+        size=Count('comments')).order_by('-size').first()
+    pages = [
+        ('about:author', reverse('about:author'), None),
+        ('about:tech', reverse('about:tech'), None),
+        ('users:signup', reverse('users:signup'), None),
+        ('users:login', reverse('users:login'), None),
+        ('users:password_reset_form',
+         reverse('users:password_reset_form'), None),
+        ('posts:index', reverse('posts:index'), None),
+    ]
+    if author is not None:
+        pages += [
+            ('posts:profile',
+             reverse('posts:profile', args=[author.username]), None),
+            ('posts:post_create', reverse('posts:post_create'), author),
+            ('posts:follow_index', reverse('posts:follow_index'), follower),
+            ('users:password_change_form',
+             reverse('users:password_change_form'), author),
+        ]
+    if group is not None:
+        pages.append(('posts:group_list',
+                      reverse('posts:group_list', args=[group.slug]), None))
+    if post is not None:
+        pages += [
+            ('posts:post_detail',
+             reverse('posts:post_detail', args=[post.pk]), None),
+            ('posts:post_comments',
+             reverse('posts:post_comments', args=[post.pk]), None),
+            ('posts:post_edit',
+             reverse('posts:post_edit', args=[post.pk]), post.author),
+        ]
+        words = post.text.split()
+        if words:
+            pages.append(('posts:search', '{}?q={}'.format(
+                reverse('posts:search'), words[0].strip('.,!?')
+            ), None))
+    return pages
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    return values[max(0, math.ceil(share * len(values)) - 1)]
+
+
+def measure(client, url, iterations, warmup=0, cold=False):
+    """Задержки запросов к url в мс и число запросов к БД."""
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        # Чтения могут уйти на реплики: считаем запросы ко всем базам
+        with ExitStack() as stack:
+            contexts = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()
+            ]
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, sum(map(len, contexts)))
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'p50': percentile(timings, 0.5),
+        'p90': percentile(timings, 0.9),
+        'p99': percentile(timings, 0.99),
+        'queries': queries,
+    }
+
+
+def run(iterations, warmup=0, cold=False):
+    """Замеры всех страниц текущей базы: {имя: результат}."""
+    results = {}
+    for name, url, user in targets():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        results[name] = measure(client, url, iterations, warmup, cold)
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Страницы, которые стали медленнее в tolerance раз или делают
+    больше запросов, чем в baseline."""
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            found.append(
+                f'{name}: запросов {base["queries"]} -> {result["queries"]}'
+            )
+        if result['p50'] > base['p50'] * tolerance:
+            found.append(
+                f'{name}: p50 {base["p50"]:.1f} -> {result["p50"]:.1f} мс'
+            )
+    return found
+
+
+@contextmanager
+def snapshot_database(path):
+    """Подключает все базы к копии снимка SQLite, сам снимок не меняется.
+
+    Реплики — копии default, поэтому и они читают тот же снимок.
+    """
+    handle, copy = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    shutil.copyfile(path, copy)
+    names = {}
+    for connection in connections.all():
+        names[connection.alias] = connection.settings_dict['NAME']
+        connection.close()
+        connection.settings_dict['NAME'] = copy
+    # Версии фрагментов в кеше относятся к другой базе
+    cache.clear()
+    try:
+        yield
+    finally:
+        for connection in connections.all():
+            connection.close()
+            connection.settings_dict['NAME'] = names[connection.alias]
+        cache.clear()
+        os.remove(copy)
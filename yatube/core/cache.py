@@ -0,0 +1,278 @@
+"""
+Кеш в файле SQLite, общий для всех процессов-воркеров на одном хосте.
+
+Значения хранятся сжатыми, объем ограничен числом записей и байтами:
+при переполнении вытесняются сначала просроченные, затем давно
+не читавшиеся записи (приближенный LRU). add и incr атомарны
+между процессами благодаря транзакциям BEGIN IMMEDIATE.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import timing
+
+_MISSING = object()
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' compressed INTEGER NOT NULL,'
+    ' size INTEGER NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    # Счетчики объема держат триггеры, чтобы не делать COUNT/SUM на запись
+    'CREATE TABLE IF NOT EXISTS cache_totals ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+    ' entries INTEGER NOT NULL,'
+    ' bytes INTEGER NOT NULL'
+    ')',
+    'INSERT OR IGNORE INTO cache_totals VALUES (1, 0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN'
+    ' UPDATE cache_totals SET entries = entries + 1,'
+    ' bytes = bytes + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN'
+    ' UPDATE cache_totals SET entries = entries - 1,'
+    ' bytes = bytes - OLD.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache'
+    ' BEGIN UPDATE cache_totals SET bytes = bytes - OLD.size + NEW.size; END',
+)
+# Пересчет счетчиков при открытии соединения: чинит файлы, в которых
+# перезапись ключа через REPLACE увеличивала их без удаления
+RECOUNT = (
+    'UPDATE cache_totals SET'
+    ' entries = (SELECT COUNT(*) FROM cache),'
+    ' bytes = (SELECT COALESCE(SUM(size), 0) FROM cache)'
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш-бэкенд поверх SQLite в режиме WAL.
+
+    OPTIONS (в дополнение к стандартным MAX_ENTRIES и CULL_FREQUENCY):
+    MAX_SIZE — предел суммарного размера значений в байтах,
+    COMPRESS_MIN_LENGTH — с какого размера значение сжимается,
+    ACCESS_RESOLUTION — как часто (в секундах) обновлять время чтения.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = os.path.abspath(location)
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._compress_min_length = int(
+            options.get('COMPRESS_MIN_LENGTH', 512)
+        )
+        self._access_resolution = float(options.get('ACCESS_RESOLUTION', 60))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение свое у каждого потока и у каждого процесса после fork
+        if getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            db = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            db.execute(RECOUNT)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return self._local.db
+
+    def _dumps(self, value):
+        data = pickle.dumps(value, self.pickle_protocol)
+        if len(data) >= self._compress_min_length:
+            packed = zlib.compress(data)
+            if len(packed) < len(data):
+                return packed, 1
+        return data, 0
+
+    @staticmethod
+    def _loads(data, compressed):
+        return pickle.loads(zlib.decompress(data) if compressed else data)
+
+    def _write(self, db, key, value, timeout):
+        data, compressed = self._dumps(value)
+        # REPLACE удалил бы строку без триггера cache_delete
+        # (recursive_triggers выключены), а UPDATE поправит счетчик байт
+        db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?, ?)'
+            ' ON CONFLICT (key) DO UPDATE SET value = excluded.value,'
+            ' compressed = excluded.compressed, size = excluded.size,'
+            ' expires = excluded.expires, accessed = excluded.accessed',
+            (key, data, compressed, len(data),
+             self.get_backend_timeout(timeout), time.time())
+        )
+
+    def _read(self, db, key):
+        """Живая запись (value, compressed, accessed) или None."""
+        row = db.execute(
+            'SELECT value, compressed, expires, accessed FROM cache'
+            ' WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, compressed, expires, accessed = row
+        if expires is not None and expires <= time.time():
+            return None
+        return value, compressed, accessed
+
+    def _transaction(self):
+        return _Immediate(self._db)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as db:
+            if self._read(db, key) is not None:
+                return False
+            self._write(db, key, value, timeout)
+        self._cull()
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        started = time.perf_counter()
+        db = self._db
+        row = self._read(db, key)
+        if row is None:
+            timing.record_cache(False, time.perf_counter() - started)
+            return default
+        value, compressed, accessed = row
+        now = time.time()
+        if now - accessed > self._access_resolution:
+            db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        value = self._loads(value, compressed)
+        timing.record_cache(True, time.perf_counter() - started)
+        return value
+
+    def get_many(self, keys, version=None):
+        result = {}
+        for key in keys:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                result[key] = value
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as db:
+            self._write(db, key, value, timeout)
+        self._cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._transaction() as db:
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._write(db, key, value, timeout)
+        self._cull()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as db:
+            if self._read(db, key) is None:
+                return False
+            db.execute(
+                'UPDATE cache SET expires = ? WHERE key = ?',
+                (self.get_backend_timeout(timeout), key)
+            )
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._transaction() as db:
+            row = self._read(db, key)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = self._loads(row[0], row[1]) + delta
+            data, compressed = self._dumps(value)
+            db.execute(
+                'UPDATE cache SET value = ?, compressed = ?, size = ?'
+                ' WHERE key = ?', (data, compressed, len(data), key)
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._read(self._db, key) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys, version=None):
+        with self._transaction() as db:
+            for key in keys:
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def _cull(self):
+        """Освобождает место, если превышен предел записей или байт."""
+        db = self._db
+        entries, size = db.execute(
+            'SELECT entries, bytes FROM cache_totals'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        with self._transaction() as db:
+            db.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            entries, size = db.execute(
+                'SELECT entries, bytes FROM cache_totals'
+            ).fetchone()
+            # Как и встроенные бэкенды, выбрасываем 1/CULL_FREQUENCY
+            # записей за шаг, но начиная с тех, что дольше всех не читались
+            while entries > self._max_entries or size > self._max_size:
+                if not self._cull_frequency:
+                    db.execute('DELETE FROM cache')
+                    break
+                db.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    (max(1, entries // self._cull_frequency),)
+                )
+                entries, size = db.execute(
+                    'SELECT entries, bytes FROM cache_totals'
+                ).fetchone()
+
+
+class _Immediate:
+    """Транзакция с блокировкой на запись с самого начала."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
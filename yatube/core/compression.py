@@ -0,0 +1,142 @@
+"""
+Сжатие ответов gzip или brotli (если установлен пакет brotli).
+
+Уровень выбирается по типу содержимого из COMPRESSION_LEVELS; типы,
+которых там нет (картинки, архивы и прочее уже сжатое), и ответы
+короче COMPRESSION_MIN_SIZE уходят как есть. Тела больше
+COMPRESSION_LARGE_SIZE сжимаются на самом быстром уровне, чтобы
+большая страница не держала воркер. Потоковые ответы сжимаются
+по мере отдачи, без сбора тела в памяти.
+
+Степень сжатия попадает в Server-Timing и в итоги core.timing.
+"""
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_LEVELS = {
+    'text/html': 6,
+    'application/json': 6,
+    'text/css': 6,
+    'application/javascript': 6,
+    'image/svg+xml': 6,
+    'text/plain': 6,
+    # Выгрузки большие и потоковые: быстрее важнее плотнее
+    'text/csv': 4,
+    'application/x-ndjson': 4,
+}
+FASTEST = 1
+
+
+def _setting(name, default):
+    return getattr(settings, f'COMPRESSION_{name}', default)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент не запретил q=0."""
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().lower().partition(';')
+        match = re.search(r'q=([\d.]+)', params)
+        if coding and not (match and float(match.group(1)) == 0):
+            encodings.add(coding)
+    return encodings
+
+
+def _gzip(level):
+    # wbits 16 + MAX_WBITS — формат gzip, а не голый deflate
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _brotli(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+
+ENCODERS = {'gzip': _gzip}
+if brotli is not None:
+    ENCODERS = {'br': _brotli, **ENCODERS}
+
+
+def compress(data, encoding, level):
+    process, finish = ENCODERS[encoding](level)
+    return process(data) + finish()
+
+
+def compress_stream(chunks, encoding, level, content_type):
+    """Сжимает поток по мере отдачи и в конце учитывает степень сжатия."""
+    process, finish = ENCODERS[encoding](level)
+    size = compressed_size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        data = process(chunk)
+        if data:
+            compressed_size += len(data)
+            yield data
+    data = finish()
+    compressed_size += len(data)
+    yield data
+    timing.record_compression(content_type, size, compressed_size)
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы подходящим для типа уровнем."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '').split(';')[0]
+        level = _setting('LEVELS', DEFAULT_LEVELS).get(content_type.strip())
+        if (level is None or response.has_header('Content-Encoding')
+                or response.status_code in (206, 304)):
+            return response
+        if (not response.streaming
+                and len(response.content) < _setting('MIN_SIZE', 1024)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = next(
+            (name for name in ENCODERS if name in accepted), None
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding, level, content_type
+            )
+            del response['Content-Length']
+        else:
+            content = response.content
+            if len(content) > _setting('LARGE_SIZE', 512 * 1024):
+                level = FASTEST
+            started = time.perf_counter()
+            compressed = compress(content, encoding, level)
+            timing.record_compression(
+                content_type, len(content), len(compressed),
+                time.perf_counter() - started
+            )
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        # Сжатое тело побайтно отличается, сильный ETag стал бы неверным
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,111 @@
+"""
+Настройка SQLite для продакшена.
+
+Каждое новое соединение получает прагмы из SQLITE_PRAGMAS: WAL, чтобы
+читатели не ждали писателя, ожидание блокировки вместо мгновенной
+ошибки и увеличенные кеш страниц и mmap. Соединения живут CONN_MAX_AGE,
+так что прагмы выполняются один раз на соединение, а не на запрос.
+
+Если запись все же упирается в «database is locked», view с декоратором
+retry_locked повторяется целиком в новой транзакции с растущей паузой.
+Раз в SQLITE_MAINTENANCE_INTERVAL после запроса один из воркеров
+обновляет статистику планировщика (PRAGMA optimize) и возвращает
+системе освобожденные страницы (incremental_vacuum).
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_KEY = 'sqlite-maintenance'
+
+DEFAULT_PRAGMAS = {
+    # Действует только для новой базы, существующую переводит VACUUM
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def _setting(name, default):
+    return getattr(settings, f'SQLITE_{name}', default)
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created: прагмы для соединения SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in _setting('PRAGMAS', DEFAULT_PRAGMAS).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'database is locked' in str(error)
+
+
+def retry_locked(view):
+    """Повторяет view в новой транзакции, если база занята записью."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        attempts = _setting('WRITE_RETRIES', 5)
+        delay = _setting('RETRY_DELAY', 0.05)
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                # Внутри чужой транзакции повторять нельзя — откатится она
+                if (not is_locked(error) or attempt == attempts - 1
+                        or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+                    raise
+                logger.warning(
+                    'База занята, повтор %s через %.2f с', view.__name__, delay
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay *= 2
+    return wrapper
+
+
+def maintain(using=DEFAULT_DB_ALIAS, analyze=False):
+    """Обновляет статистику и освобождает страницы базы SQLite."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE' if analyze else 'PRAGMA optimize')
+        cursor.execute(
+            'PRAGMA incremental_vacuum(%d)'
+            % _setting('VACUUM_PAGES', 1000)
+        )
+        cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+
+def maintain_periodically(sender, **kwargs):
+    """Обработчик request_finished: обслуживание не чаще интервала.
+
+    cache.add атомарен между воркерами, поэтому обслуживание запускает
+    только один из них. add берет блокировку записи в общем кеше,
+    поэтому сначала дешевое чтение: пока отметка жива, add не нужен.
+    """
+    interval = _setting('MAINTENANCE_INTERVAL', None)
+    if not interval or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return
+    if cache.get(MAINTENANCE_KEY) is not None:
+        return
+    if not cache.add(MAINTENANCE_KEY, True, interval):
+        return
+    try:
+        maintain()
+    except OperationalError:
+        logger.exception('Не удалось обслужить базу')
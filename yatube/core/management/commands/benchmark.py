@@ -0,0 +1,86 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и число запросов страниц posts, users и about '
+        'на текущей базе или на снимках generate_dataset. '
+        'Замер на снимке очищает кеш.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--snapshot', action='append', default=[], metavar='FILE',
+            help='Снимок базы; можно указать несколько размеров данных'
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--baseline', metavar='FILE',
+            help='Сравнить с сохраненными замерами'
+        )
+        parser.add_argument(
+            '--save-baseline', metavar='FILE',
+            help='Сохранить замеры как эталон'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.25,
+            help='Во сколько раз p50 может вырасти без тревоги'
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        for path in options['snapshot'] or [None]:
+            label = os.path.basename(path) if path else 'current'
+            if path is None:
+                results[label] = self.run(options)
+                continue
+            with benchmark.snapshot_database(path):
+                results[label] = self.run(options)
+        for label, pages in results.items():
+            self.report(label, pages)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+            found = [
+                f'[{label}] {problem}'
+                for label, pages in results.items()
+                for problem in benchmark.regressions(
+                    pages, baseline.get(label, {}), options['tolerance']
+                )
+            ]
+            if found:
+                raise CommandError(
+                    'Найдены регрессии:\n' + '\n'.join(found)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, options):
+        return benchmark.run(
+            options['iterations'], options['warmup'], options['cold']
+        )
+
+    def report(self, label, pages):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f'{"страница":<30}{"код":>5}{"p50":>9}{"p90":>9}{"p99":>9}'
+            f'{"запросы":>9}'
+        )
+        for name, result in sorted(pages.items()):
+            self.stdout.write(
+                f'{name:<30}{result["status"]:>5}{result["p50"]:>9.1f}'
+                f'{result["p90"]:>9.1f}{result["p99"]:>9.1f}'
+                f'{result["queries"]:>9}'
+            )
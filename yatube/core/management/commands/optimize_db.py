@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import db
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет статистику планировщика SQLite и освобождает '
+        'страницы удаленных строк; удобно запускать из cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Алиас базы из DATABASES'
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Полный VACUUM с переводом базы в auto_vacuum=INCREMENTAL'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Команда нужна только для SQLite')
+            return
+        if options['vacuum']:
+            with connection.cursor() as cursor:
+                # auto_vacuum существующей базы меняется только VACUUM
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+        db.maintain(using, analyze=True)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum')
+            auto_vacuum = cursor.fetchone()[0]
+            cursor.execute('PRAGMA freelist_count')
+            free = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика обновлена; auto_vacuum={auto_vacuum}, '
+            f'свободных страниц {free}'
+        ))
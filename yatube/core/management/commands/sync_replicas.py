@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+        'через online backup, не останавливая запись'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые столько секунд'
+        )
+        parser.add_argument(
+            '--pages', type=int, default=1024,
+            help='Страниц за шаг backup: между шагами пишут другие'
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст')
+        while True:
+            started = time.perf_counter()
+            self.sync(replicas, options['pages'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплик обновлено: {len(replicas)} '
+                f'за {time.perf_counter() - started:.2f} с'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def sync(replicas, pages):
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+                raise CommandError('Копировать можно только базы SQLite')
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection, pages=pages)
@@ -32,3 +32,55 @@ class GenerationModel(models.Model):
         return self.RETURN_STR.format(
             self.text, self.pub_date,
         )
+
+
+class Profile(models.Model):
+    """Сохраненный профиль запроса (см. core/profiling.py)."""
+    CPROFILE = 'cprofile'
+    SAMPLED = 'sampled'
+    KINDS = (
+        (CPROFILE, 'cProfile'),
+        (SAMPLED, 'Выборка стеков'),
+    )
+    view_name = models.CharField(
+        max_length=200,
+        db_index=True,
+        verbose_name='View'
+    )
+    method = models.CharField(
+        max_length=10,
+        verbose_name='Метод'
+    )
+    path = models.TextField(
+        verbose_name='Адрес'
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность, мс'
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KINDS,
+        verbose_name='Вид'
+    )
+    # pstats (marshal) для cProfile, свернутые стеки для выборки
+    data = models.BinaryField(
+        verbose_name='Данные'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.view_name} {self.duration:.0f} мс'
+
+    @property
+    def filename(self):
+        extension = 'prof' if self.kind == self.CPROFILE else 'folded'
+        return f'{self.view_name.replace(":", "-")}-{self.pk}.{extension}'
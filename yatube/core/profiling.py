@@ -0,0 +1,175 @@
+"""
+Профилирование запросов в продакшене.
+
+Доля PROFILE_SAMPLE_RATE запросов целиком идет под cProfile, профиль
+сохраняется в формате pstats. Остальные запросы при заданном
+PROFILE_SLOW_MS наблюдает дешевый сэмплер: отдельный поток раз
+в PROFILE_INTERVAL_MS снимает стеки потоков, занятых запросами.
+Если запрос оказался медленнее порога, его стеки сохраняются в свернутом
+виде (строка «кадр;кадр;кадр число»), который понимают flamegraph.pl
+и speedscope. Для каждого view хранится не больше PROFILE_KEEP профилей.
+"""
+import cProfile
+import logging
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, f'PROFILE_{name}', default)
+
+
+def _label(code):
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Стек кадра от корня к вершине в свернутом виде."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    """Поток, который снимает стеки зарегистрированных потоков."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self._thread = None
+
+    def start(self):
+        """Начинает копить стеки текущего потока."""
+        samples = Counter()
+        with self._lock:
+            self._active[threading.get_ident()] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='profiling-sampler', daemon=True
+                )
+                self._thread.start()
+        return samples
+
+    def stop(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(_setting('INTERVAL_MS', 10) / 1000)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[collapse(frame)] += 1
+
+
+sampler = Sampler()
+
+
+class _Stats:
+    # pstats.Stats принимает объект с create_stats() и stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def folded(samples):
+    """Свернутые стеки в формате flamegraph.pl."""
+    return ''.join(
+        f'{stack} {count}\n' for stack, count in samples.most_common()
+    ).encode()
+
+
+def summary(profile, limit=30):
+    """Текстовая сводка профиля для админки."""
+    data = bytes(profile.data)
+    out = StringIO()
+    if profile.kind == Profile.CPROFILE:
+        stats = pstats.Stats(_Stats(marshal.loads(data)), stream=out)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+    # Для выборки — функции, на которых чаще всего стоял поток
+    leaves = Counter()
+    for line in data.decode().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        leaves[stack.rsplit(';', 1)[-1]] += int(count)
+    total = sum(leaves.values())
+    for label, count in leaves.most_common(limit):
+        out.write(f'{count:6d} {count / total:6.1%}  {label}\n')
+    return out.getvalue() or 'Нет выборок: запрос короче интервала.'
+
+
+def save(request, duration, kind, data):
+    """Сохраняет профиль и оставляет PROFILE_KEEP последних для view."""
+    match = request.resolver_match
+    view_name = match.view_name if match else 'unresolved'
+    Profile.objects.create(
+        view_name=view_name, method=request.method,
+        path=request.get_full_path(), duration=duration * 1000,
+        kind=kind, data=data,
+    )
+    stale = Profile.objects.filter(view_name=view_name).values_list(
+        'pk', flat=True
+    )[_setting('KEEP', 20):]
+    Profile.objects.filter(pk__in=list(stale)).delete()
+
+
+class ProfilingMiddleware:
+    """Профилирует выборку запросов и медленные запросы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = None
+        samples = None
+        if random.random() < _setting('SAMPLE_RATE', 0):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Уже работает другой профилировщик
+                profiler = None
+        slow = _setting('SLOW_MS', None)
+        if profiler is None and slow is not None:
+            samples = sampler.start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if samples is not None:
+                sampler.stop()
+        duration = time.perf_counter() - started
+        try:
+            if profiler is not None:
+                profiler.create_stats()
+                save(request, duration, Profile.CPROFILE,
+                     marshal.dumps(profiler.stats))
+            elif samples is not None and duration * 1000 >= slow:
+                save(request, duration, Profile.SAMPLED, folded(samples))
+        except Exception:
+            # Профиль не должен ломать ответ
+            logger.exception('Не удалось сохранить профиль запроса')
+        return response
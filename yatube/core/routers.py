@@ -0,0 +1,96 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+Внутри запросов (их размечает ReplicaMiddleware) чтения уходят на
+случайную реплику из DATABASE_REPLICAS, записи — всегда в default.
+Реплика отстает от основной базы, поэтому пользователь, который только
+что что-то записал, DATABASE_STICKY_SECONDS читает из default: запрос
+с записью (или любой небезопасный метод) ставит подписанную куку,
+и пока она жива, все чтения его запросов идут в основную базу.
+
+Закешированное по версиям (фрагменты лент и ETag в posts.feed_cache)
+строится из default, пока версия моложе того же окна: иначе отставшая
+реплика попала бы в кеш под новой версией без таймаута.
+
+Команды, воркеры и все, что работает вне запроса, читают default:
+импорт и пересборка лент не должны видеть отставшие данные.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'primary'
+STICKY_SALT = 'core.routers.sticky'
+# Сессии читаются сразу после записи при входе — только из default
+PRIMARY_APPS = {'sessions'}
+
+_local = threading.local()
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_STICKY_SECONDS', 15)
+
+
+def pin():
+    """Направляет чтения до конца запроса в основную базу."""
+    _local.pinned = True
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if (not aliases or not getattr(_local, 'active', False)
+                or getattr(_local, 'pinned', False)
+                or model._meta.app_label in PRIMARY_APPS):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        if getattr(_local, 'active', False):
+            _local.wrote = True
+            pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно связывать
+        if {obj1._state.db, obj2._state.db} <= set(settings.DATABASES):
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """Размечает запрос для роутера и держит куку «читать из default»."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.active = True
+        _local.wrote = False
+        _local.pinned = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        try:
+            request.get_signed_cookie(
+                STICKY_COOKIE, salt=STICKY_SALT, max_age=sticky_seconds()
+            )
+        except (KeyError, signing.BadSignature):
+            pass
+        else:
+            pin()
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _local.wrote
+            _local.active = _local.wrote = _local.pinned = False
+        if wrote:
+            response.set_signed_cookie(
+                STICKY_COOKIE, '1', salt=STICKY_SALT,
+                max_age=sticky_seconds(), httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,71 @@
+"""
+Хранилище статики для collectstatic: имена с хешем содержимого
+и готовые сжатые копии рядом с файлами.
+
+Файл с хешем в имени никогда не меняется, поэтому фронтовый сервер
+может отдавать его с Cache-Control: max-age=31536000, immutable, а
+вместо сжатия на лету брать соседние .gz и .br (gzip_static и
+brotli_static в nginx). Brotli — необязательная зависимость: без пакета
+brotli собираются только .gz.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Картинки и шрифты уже сжаты, их повторное сжатие ничего не дает
+COMPRESSED_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.html', '.xml',
+)
+
+
+def compressors():
+    """Пары (расширение, функция сжатия) доступных алгоритмов."""
+    pairs = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        pairs.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return pairs
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Без манифеста (collectstatic не запускали) ссылки ведут
+    # на исходные имена, а не роняют страницу
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        """Пишет сжатые копии файла, если они меньше оригинала."""
+        if not name.endswith(COMPRESSED_EXTENSIONS):
+            return []
+        with self.open(name) as original:
+            data = original.read()
+        written = []
+        for extension, compress in compressors():
+            compressed_name = name + extension
+            # Имя с хешем не меняет содержимое: готовую копию не пересжимаем
+            if self.exists(compressed_name):
+                continue
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            self._save(compressed_name, ContentFile(compressed))
+            written.append(compressed_name)
+        return written
@@ -0,0 +1,84 @@
+"""
+Шаблоны компилируются один раз на процесс.
+
+Loader — кеширующий загрузчик Django, который в режиме autoreload
+(разработка) сверяет время изменения файла шаблона при каждом
+обращении и перечитывает измененные, а ненайденные шаблоны не кеширует.
+В продакшене проверок нет: шаблон из кеша отдается как есть.
+
+precompile() заранее компилирует все шаблоны проекта, чтобы первые
+запросы воркера не платили за разбор, а синтаксические ошибки
+в шаблонах всплывали при старте.
+"""
+import os
+
+from django.conf import settings
+from django.template import Engine, Template
+from django.template.loaders import cached
+
+
+class Loader(cached.Loader):
+    def __init__(self, engine, loaders, autoreload=False):
+        self.autoreload = autoreload
+        self._mtimes = {}
+        super().__init__(engine, loaders)
+
+    @staticmethod
+    def _mtime(name):
+        try:
+            return os.stat(name).st_mtime
+        except OSError:
+            return None
+
+    def _fresh(self, cached_template):
+        if not isinstance(cached_template, Template):
+            # Шаблон могли создать после неудачного поиска
+            return False
+        name = cached_template.origin.name
+        mtime = self._mtime(name)
+        return mtime is not None and mtime == self._mtimes.get(name)
+
+    def get_template(self, template_name, skip=None):
+        if not self.autoreload:
+            return super().get_template(template_name, skip)
+        key = self.cache_key(template_name, skip)
+        cached_template = self.get_template_cache.get(key)
+        if cached_template and self._fresh(cached_template):
+            return cached_template
+        self.get_template_cache.pop(key, None)
+        template = super().get_template(template_name, skip)
+        self._mtimes[template.origin.name] = self._mtime(template.origin.name)
+        return template
+
+    def reset(self):
+        super().reset()
+        self._mtimes.clear()
+
+
+def template_names(engine, root):
+    """Имена всех шаблонов из каталогов загрузчиков внутри root."""
+    root = os.path.abspath(root)
+    names = set()
+    for loader in engine.template_loaders:
+        for source in getattr(loader, 'loaders', [loader]):
+            for directory in source.get_dirs():
+                directory = os.path.abspath(directory)
+                if os.path.commonpath([root, directory]) != root:
+                    continue
+                for path, _, files in os.walk(directory):
+                    names.update(
+                        os.path.relpath(
+                            os.path.join(path, name), directory
+                        ).replace(os.sep, '/')
+                        for name in files
+                    )
+    return sorted(names)
+
+
+def precompile(engine=None, root=None):
+    """Компилирует шаблоны проекта в кеш загрузчика, возвращает их число."""
+    engine = engine or Engine.get_default()
+    names = template_names(engine, root or settings.BASE_DIR)
+    for name in names:
+        engine.get_template(name)
+    return len(names)
@@ -0,0 +1,43 @@
+"""
+Тесты работают со своим кешем во временном каталоге.
+
+Кеш SQLite общий для всех воркеров хоста, а тесты его очищают:
+без подмены manage.py test сбрасывал бы кеш работающего сайта.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from .cache import SQLiteCache
+
+
+def temporary_caches(directory):
+    """CACHES, в которых файлы кешей SQLite перенесены в directory."""
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        backend = config.get('BACKEND', '')
+        if backend.rsplit('.', 1)[-1] == SQLiteCache.__name__:
+            config = dict(
+                config, LOCATION=os.path.join(directory, f'{alias}.sqlite3')
+            )
+        caches[alias] = config
+    return caches
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp()
+        self._caches = override_settings(
+            CACHES=temporary_caches(self._cache_dir)
+        )
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
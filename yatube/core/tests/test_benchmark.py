@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+from .. import benchmark
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        post = Post.objects.create(
+            author=author, group=group, text='Замеры скорости'
+        )
+        Comment.objects.create(post=post, author=reader, text='Отлично')
+        Follow.objects.create(user=reader, author=author)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.baseline = os.path.join(self.dir, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_every_view_is_measured(self):
+        out = StringIO()
+        call_command(
+            'benchmark', iterations=2, warmup=0,
+            save_baseline=self.baseline, stdout=out
+        )
+        with open(self.baseline) as file:
+            pages = json.load(file)['current']
+        for name in ('posts:index', 'posts:search', 'posts:follow_index',
+                     'users:login', 'about:tech'):
+            with self.subTest(page=name):
+                self.assertEqual(pages[name]['status'], 200)
+        self.assertIn('posts:post_detail', out.getvalue())
+
+    def test_regressions_are_flagged(self):
+        with open(self.baseline, 'w') as file:
+            json.dump({'current': {
+                'posts:index': {'p50': 0.0001, 'queries': 0},
+            }}, file)
+        with self.assertRaisesMessage(CommandError, 'posts:index'):
+            call_command(
+                'benchmark', iterations=2, warmup=0, cold=True,
+                baseline=self.baseline, stdout=StringIO()
+            )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaBenchmarkTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def test_replica_queries_are_counted(self):
+        result = benchmark.measure(
+            Client(), reverse('posts:index'), iterations=1, cold=True
+        )
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['queries'], 0)
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+BIG_VALUE = 'текст ' * 1000
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def backend(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_values_are_shared_between_instances(self):
+        writer, reader = self.backend(), self.backend()
+        writer.set('key', {'value': BIG_VALUE})
+        self.assertEqual(reader.get('key'), {'value': BIG_VALUE})
+        reader.delete('key')
+        self.assertIsNone(writer.get('key'))
+
+    def test_large_values_are_compressed(self):
+        cache = self.backend()
+        cache.set('key', BIG_VALUE)
+        size, compressed = cache._db.execute(
+            'SELECT size, compressed FROM cache'
+        ).fetchone()
+        self.assertEqual(compressed, 1)
+        self.assertLess(size, len(BIG_VALUE))
+
+    def test_add_and_incr_are_atomic(self):
+        first, second = self.backend(), self.backend()
+        self.assertTrue(first.add('counter', 1))
+        self.assertFalse(second.add('counter', 100))
+        self.assertEqual(second.incr('counter'), 2)
+        self.assertEqual(first.incr('counter', 10), 12)
+        with self.assertRaises(ValueError):
+            first.incr('missing')
+
+    def test_expired_values_are_missing(self):
+        cache = self.backend()
+        cache.set('key', 'value', 0)
+        self.assertIsNone(cache.get('key'))
+        self.assertTrue(cache.add('key', 'value'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.backend(
+            MAX_ENTRIES=3, CULL_FREQUENCY=3, ACCESS_RESOLUTION=0
+        )
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('d', 'd')
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertFalse(cache.has_key('b'))
+
+    def test_size_limit(self):
+        cache = self.backend(MAX_SIZE=5000)
+        for number in range(10):
+            cache.set(number, os.urandom(1000))
+        entries, size = cache._db.execute(
+            'SELECT entries, bytes FROM cache_totals'
+        ).fetchone()
+        self.assertLessEqual(size, 5000)
+        self.assertLess(entries, 10)
+
+    def test_overwrites_do_not_inflate_totals(self):
+        cache = self.backend(MAX_ENTRIES=100)
+        for number in range(200):
+            cache.set('hot', number)
+        cache.set('fresh', 'value')
+        self.assertEqual(cache.get('hot'), 199)
+        self.assertEqual(cache.get('fresh'), 'value')
+        entries, size = cache._db.execute(
+            'SELECT entries, bytes FROM cache_totals'
+        ).fetchone()
+        self.assertEqual(entries, 2)
+        self.assertEqual(size, cache._db.execute(
+            'SELECT SUM(size) FROM cache'
+        ).fetchone()[0])
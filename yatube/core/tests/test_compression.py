@@ -0,0 +1,90 @@
+import gzip
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import timing
+from ..compression import CompressionMiddleware, accepted_encodings
+
+HTML = '<p>Пост в ленте</p>' * 200
+
+
+def respond(response, accept='gzip'):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        for number in range(10):
+            Post.objects.create(author=author, text=f'Пост номер {number}')
+
+    def setUp(self):
+        cache.clear()
+        timing.reset()
+
+    def test_feed_pages_are_compressed(self):
+        url = reverse('posts:index')
+        plain = Client().get(url)
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertGreater(len(plain.content), 3 * len(response.content))
+        self.assertIn('compress;dur=', response['Server-Timing'])
+        self.assertGreater(
+            timing.histograms()['compression']['text/html']['ratio'], 3
+        )
+
+    def test_client_preferences(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0, deflate, BR;q=0.5'),
+            {'deflate', 'br'}
+        )
+        for accept in ('', 'identity', 'gzip;q=0'):
+            response = respond(HttpResponse(HTML), accept)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_and_binary_bodies_are_skipped(self):
+        for response in (
+            HttpResponse('<p>Коротко</p>'),
+            HttpResponse(b'\x89PNG' * 1000, content_type='image/png'),
+            HttpResponse(HTML, status=304),
+        ):
+            self.assertFalse(
+                respond(response).has_header('Content-Encoding')
+            )
+
+    def test_strong_etag_becomes_weak(self):
+        response = HttpResponse(HTML)
+        response['ETag'] = '"feed"'
+        self.assertEqual(respond(response)['ETag'], 'W/"feed"')
+
+    def test_streaming_responses_are_compressed_lazily(self):
+        consumed = []
+
+        def lines():
+            for number in range(1000):
+                consumed.append(number)
+                yield f'{number},текст строки выгрузки\n'
+
+        response = respond(StreamingHttpResponse(
+            lines(), content_type='text/csv; charset=utf-8'
+        ))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(consumed)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(
+            gzip.decompress(body).decode(),
+            ''.join(f'{number},текст строки выгрузки\n'
+                    for number in range(1000))
+        )
+        totals = timing.histograms()['compression']['text/csv']
+        self.assertEqual(totals['compressed'], len(body))
@@ -0,0 +1,99 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from posts.models import Group
+
+from .. import db
+
+
+class SQLiteTuningTests(TransactionTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        cache.delete(db.MAINTENANCE_KEY)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_new_connections_get_pragmas(self):
+        raw = sqlite3.connect(os.path.join(self.dir, 'db.sqlite3'))
+        db.apply_pragmas(
+            None, SimpleNamespace(vendor='sqlite', connection=raw)
+        )
+        pragmas = {
+            name: raw.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'auto_vacuum', 'busy_timeout',
+                         'synchronous', 'cache_size')
+        }
+        raw.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'auto_vacuum': 2, 'busy_timeout': 5000,
+            'synchronous': 1, 'cache_size': -64 * 1024,
+        })
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_locked_writes_are_retried_in_new_transaction(self):
+        calls = []
+
+        @db.retry_locked
+        def view(request):
+            calls.append(request)
+            Group.objects.create(
+                title='Группа', slug=f'group-{len(calls)}', description=''
+            )
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        with mock.patch.object(db, 'time') as time, self.assertLogs(db.logger):
+            self.assertEqual(view('request'), 'ok')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(time.sleep.call_count, 2)
+        # Записи неудачных попыток откатились
+        self.assertEqual(
+            list(Group.objects.values_list('slug', flat=True)), ['group-3']
+        )
+
+    def test_other_errors_and_last_attempt_are_raised(self):
+        @db.retry_locked
+        def locked(request):
+            raise OperationalError('database is locked')
+
+        @db.retry_locked
+        def broken(request):
+            raise OperationalError('no such table')
+
+        with mock.patch.object(db, 'time') as time:
+            with self.assertRaises(OperationalError), self.assertLogs(
+                db.logger
+            ):
+                locked(None)
+            self.assertEqual(time.sleep.call_count, 4)
+            with self.assertRaises(OperationalError):
+                broken(None)
+            self.assertEqual(time.sleep.call_count, 4)
+
+    def test_maintenance_runs_once_per_interval(self):
+        with mock.patch.object(db, 'maintain') as maintain, \
+                mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            for _ in range(3):
+                db.maintain_periodically(None)
+        maintain.assert_called_once_with()
+        # Пока интервал не истек, запросы не берут блокировку записи кеша
+        add.assert_called_once()
+
+    def test_optimize_db_command(self):
+        out = StringIO()
+        call_command('optimize_db', vacuum=True, stdout=out)
+        self.assertIn('Статистика обновлена', out.getvalue())
@@ -0,0 +1,103 @@
+import marshal
+import threading
+import time
+from collections import Counter
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import profiling
+from ..models import Profile
+
+INDEX_URL = reverse('posts:index')
+PROFILES_URL = reverse('admin:core_profile_changelist')
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@override_settings(PROFILE_SAMPLE_RATE=0, PROFILE_SLOW_MS=None)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.root = User.objects.create_superuser(
+            username='root', email='root@example.com', password='pass'
+        )
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Профилируемый пост')
+
+    def setUp(self):
+        self.guest = Client()
+        self.admin = Client()
+        self.admin.force_login(self.root)
+        self.moderator = Client()
+        self.moderator.force_login(self.staff)
+
+    def test_sampled_requests_are_profiled(self):
+        with self.settings(PROFILE_SAMPLE_RATE=1):
+            self.guest.get(INDEX_URL)
+        profile = Profile.objects.get()
+        self.assertEqual(profile.view_name, 'posts:index')
+        self.assertEqual(profile.kind, Profile.CPROFILE)
+        stats = marshal.loads(bytes(profile.data))
+        self.assertIn('index', {name for _, _, name in stats})
+        self.assertIn('cumulative', profiling.summary(profile))
+
+    def test_other_requests_are_not_profiled(self):
+        with self.settings(PROFILE_SLOW_MS=60 * 1000):
+            self.guest.get(INDEX_URL)
+        self.assertFalse(Profile.objects.exists())
+
+    def test_slow_requests_keep_sampled_stacks(self):
+        with self.settings(PROFILE_SLOW_MS=0, PROFILE_KEEP=2):
+            for _ in range(3):
+                self.guest.get(INDEX_URL)
+        self.assertEqual(
+            Profile.objects.filter(
+                view_name='posts:index', kind=Profile.SAMPLED
+            ).count(), 2
+        )
+
+    def test_sampler_collects_stacks_of_registered_thread(self):
+        samples = Counter()
+
+        def work():
+            profiling.sampler.start()
+            busy_loop(0.2)
+            samples.update(profiling.sampler.stop())
+
+        with self.settings(PROFILE_INTERVAL_MS=1):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        self.assertTrue(samples)
+        self.assertTrue(any('busy_loop' in stack for stack in samples))
+        lines = profiling.folded(samples).decode().splitlines()
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit()
+                            for line in lines))
+
+    def test_profiles_are_for_superusers_only(self):
+        with self.settings(PROFILE_SAMPLE_RATE=1):
+            self.guest.get(INDEX_URL)
+        profile = Profile.objects.get()
+        download_url = reverse(
+            'admin:core_profile_download', args=(profile.pk,)
+        )
+        self.assertEqual(self.moderator.get(PROFILES_URL).status_code, 403)
+        self.assertEqual(self.moderator.get(download_url).status_code, 403)
+        self.assertContains(self.admin.get(PROFILES_URL), profile.filename)
+        self.assertContains(
+            self.admin.get(
+                reverse('admin:core_profile_change', args=(profile.pk,))
+            ),
+            'cumulative'
+        )
+        response = self.admin.get(download_url)
+        self.assertEqual(bytes(response.content), bytes(profile.data))
+        self.assertIn(profile.filename, response['Content-Disposition'])
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import router
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..routers import STICKY_COOKIE
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.sync()
+        self.guest = Client()
+        self.author = Client()
+        self.author.force_login(self.user)
+
+    def sync(self):
+        call_command('sync_replicas', stdout=StringIO())
+
+    def detail(self, client, post):
+        return client.get(reverse('posts:post_detail', args=(post.pk,)))
+
+    def test_request_reads_go_to_replica(self):
+        post = Post.objects.create(author=self.user, text='Еще не на реплике')
+        self.assertEqual(self.detail(self.guest, post).status_code, 404)
+        self.sync()
+        self.assertEqual(self.detail(self.guest, post).status_code, 200)
+
+    def test_writer_reads_own_writes_from_primary(self):
+        response = self.author.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        post = Post.objects.get(text='Свежий пост')
+        self.assertEqual(self.detail(self.author, post).status_code, 200)
+        self.assertEqual(self.detail(self.guest, post).status_code, 404)
+
+    def test_fresh_feed_versions_are_rendered_from_primary(self):
+        Post.objects.create(author=self.user, text='Еще не на реплике')
+        self.assertContains(
+            self.guest.get(reverse('posts:index')), 'Еще не на реплике'
+        )
+
+    @override_settings(DATABASE_STICKY_SECONDS=0)
+    def test_old_feed_versions_are_rendered_from_replica(self):
+        Post.objects.create(author=self.user, text='Еще не на реплике')
+        self.assertNotContains(
+            self.guest.get(reverse('posts:index')), 'Еще не на реплике'
+        )
+
+    def test_reads_without_writes_are_not_sticky(self):
+        response = self.author.get(reverse('posts:index'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_code_outside_requests_reads_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
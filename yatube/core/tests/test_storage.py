@@ -0,0 +1,48 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from .. import storage
+
+CSS = 'css/bootstrap.min.css'
+LOGO = 'img/logo.png'
+
+
+def static_url(name):
+    return Template(
+        '{% load static %}{% static name %}'
+    ).render(Context({'name': name}))
+
+
+class StaticStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(STATIC_ROOT=self.root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        css = staticfiles_storage.stored_name(CSS)
+        self.assertNotEqual(css, CSS)
+        self.assertEqual(static_url(CSS), f'/static/{css}')
+        path = staticfiles_storage.path(css)
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as packed:
+            self.assertEqual(packed.read(), original.read())
+        self.assertEqual(
+            os.path.exists(path + '.br'), storage.brotli is not None
+        )
+        logo = staticfiles_storage.path(staticfiles_storage.stored_name(LOGO))
+        self.assertFalse(os.path.exists(logo + '.gz'))
+
+    def test_unhashed_names_without_manifest(self):
+        self.assertEqual(static_url(CSS), f'/static/{CSS}')
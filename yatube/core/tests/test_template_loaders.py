@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+
+from django.template import Context, Engine
+from django.test import SimpleTestCase
+
+from ..template_loaders import precompile
+
+
+class TemplateLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.write('page.html', '{% extends "base.html" %}'
+                   '{% block body %}страница{% endblock %}')
+        self.write('base.html', '<body>{% block body %}{% endblock %}</body>')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, name, content, age=0):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        # Время изменения явно, чтобы не зависеть от точности ФС
+        mtime = os.stat(path).st_mtime + age
+        os.utime(path, (mtime, mtime))
+
+    def engine(self, autoreload):
+        return Engine(dirs=[self.dir], loaders=[
+            ('core.template_loaders.Loader', [
+                'django.template.loaders.filesystem.Loader',
+            ], autoreload),
+        ])
+
+    def render(self, engine, name='page.html'):
+        return engine.get_template(name).render(Context())
+
+    def test_templates_are_compiled_once(self):
+        engine = self.engine(autoreload=False)
+        self.assertIs(
+            engine.get_template('page.html'), engine.get_template('page.html')
+        )
+        self.render(engine)
+        self.write('base.html', '<main>{% block body %}{% endblock %}</main>',
+                   age=10)
+        self.assertEqual(self.render(engine), '<body>страница</body>')
+
+    def test_changed_templates_are_reloaded(self):
+        engine = self.engine(autoreload=True)
+        template = engine.get_template('page.html')
+        self.assertIs(engine.get_template('page.html'), template)
+        self.assertEqual(self.render(engine), '<body>страница</body>')
+        self.write('base.html', '<main>{% block body %}{% endblock %}</main>',
+                   age=10)
+        self.assertEqual(self.render(engine), '<main>страница</main>')
+        self.write('new.html', 'новый')
+        self.assertEqual(self.render(engine, 'new.html'), 'новый')
+
+    def test_precompile_fills_cache(self):
+        engine = self.engine(autoreload=False)
+        self.assertEqual(precompile(engine, self.dir), 2)
+        loader = engine.template_loaders[0]
+        self.assertEqual(
+            set(loader.get_template_cache), {'base.html', 'page.html'}
+        )
+
+    def test_project_templates_compile(self):
+        self.assertGreater(precompile(), 0)
@@ -0,0 +1,15 @@
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+
+class TestRunnerTests(SimpleTestCase):
+    def test_tests_use_temporary_cache(self):
+        location = settings.CACHES['default']['LOCATION']
+        self.assertNotEqual(
+            os.path.dirname(location),
+            os.path.join(settings.BASE_DIR, 'cache')
+        )
+        self.assertEqual(cache._path, os.path.abspath(location))
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import timing
+
+INDEX_URL = reverse('posts:index')
+TIMINGS_URL = reverse('timings')
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Замеры запроса')
+
+    def setUp(self):
+        cache.clear()
+        timing.reset()
+        self.guest = Client()
+        self.admin = Client()
+        self.admin.force_login(self.staff)
+
+    def test_response_has_server_timing(self):
+        value = self.guest.get(INDEX_URL)['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;dur=', 'total;dur='):
+            self.assertIn(metric, value)
+        self.assertRegex(value, r'desc="[1-9]\d* queries"')
+        self.assertRegex(value, r'desc="\d+ hit, [1-9]\d* miss"')
+
+    def test_latencies_are_collected_per_view(self):
+        for _ in range(3):
+            self.guest.get(INDEX_URL)
+        histogram = timing.histograms()['views']['posts:index']
+        self.assertEqual(histogram['count'], 3)
+        self.assertEqual(sum(histogram['buckets']), 3)
+        self.assertIn('p99', histogram)
+
+    def test_histograms_are_for_staff_only(self):
+        self.guest.get(INDEX_URL)
+        self.assertEqual(self.guest.get(TIMINGS_URL).status_code, 302)
+        response = self.admin.get(TIMINGS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json()['views'])
+
+    def test_nothing_is_measured_outside_requests(self):
+        self.assertIsNone(timing.current())
+        with timing.span('thumb'):
+            pass
+        timing.record_cache(True, 0.1)
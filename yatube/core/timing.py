@@ -0,0 +1,210 @@
+"""
+Замеры запроса для заголовка Server-Timing: время и число SQL-запросов,
+рендеринг шаблонов, обращения к кешу, миниатюры и сжатие ответа.
+Для каждого view в памяти процесса копится гистограмма задержек,
+для каждого типа содержимого — сколько байт сэкономило сжатие.
+
+Вне запроса (команды, воркеры миниатюр) замеры ничего не делают.
+Промежутки могут вкладываться друг в друга: фрагмент из кеша читается
+во время рендеринга шаблона и попадает в оба замера.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.backends.django import Template
+
+# Верхние границы корзин гистограммы в мс; последняя корзина — все, что выше
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_compression = {}
+
+
+class Metrics:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.rendering = False
+        self.ratio = None
+
+
+def current():
+    """Замеры текущего запроса или None."""
+    return getattr(_local, 'metrics', None)
+
+
+def add(name, duration, count=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.durations[name] += duration
+        metrics.counts[name] += count
+
+
+@contextmanager
+def span(name):
+    """Добавляет время блока к замеру name текущего запроса."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - started)
+
+
+def record_cache(hit, duration):
+    metrics = current()
+    if metrics is not None:
+        metrics.durations['cache'] += duration
+        metrics.counts['cache_hit' if hit else 'cache_miss'] += 1
+
+
+def record_compression(content_type, size, compressed_size, duration=0):
+    """Учитывает сжатие ответа: в заголовке запроса и в итогах процесса.
+
+    Потоковые ответы сжимаются уже после заголовков, поэтому
+    попадают только в итоги.
+    """
+    metrics = current()
+    if metrics is not None:
+        metrics.durations['compress'] += duration
+        metrics.ratio = size / max(compressed_size, 1)
+    with _lock:
+        totals = _compression.setdefault(
+            content_type, {'responses': 0, 'bytes': 0, 'compressed': 0}
+        )
+        totals['responses'] += 1
+        totals['bytes'] += size
+        totals['compressed'] += compressed_size
+
+
+def _query_timer(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        add('db', time.perf_counter() - started)
+
+
+def _timed_render(render):
+    def wrapper(self, context=None, request=None):
+        metrics = current()
+        # Вложенные render_to_string уже входят во внешний замер
+        if metrics is None or metrics.rendering:
+            return render(self, context, request)
+        metrics.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.rendering = False
+            add('tpl', time.perf_counter() - started)
+    wrapper.timed = True
+    return wrapper
+
+
+def install():
+    """Подключает замер шаблонов Django; вызывается из CoreConfig.ready."""
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
+
+
+def header(metrics, total):
+    """Значение заголовка Server-Timing."""
+    durations, counts = metrics.durations, metrics.counts
+    parts = [
+        f'db;dur={durations["db"] * 1000:.1f};desc="{counts["db"]} queries"',
+        f'tpl;dur={durations["tpl"] * 1000:.1f}',
+        f'cache;dur={durations["cache"] * 1000:.1f};'
+        f'desc="{counts["cache_hit"]} hit, {counts["cache_miss"]} miss"',
+    ]
+    if 'thumb' in durations:
+        parts.append(f'thumb;dur={durations["thumb"] * 1000:.1f}')
+    if metrics.ratio is not None:
+        parts.append(
+            f'compress;dur={durations["compress"] * 1000:.1f};'
+            f'desc="ratio {metrics.ratio:.1f}"'
+        )
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def observe(view_name, duration):
+    """Добавляет задержку запроса в гистограмму view."""
+    index = bisect.bisect_left(BUCKETS, duration * 1000)
+    with _lock:
+        histogram = _histograms.get(view_name)
+        if histogram is None:
+            histogram = _histograms[view_name] = {
+                'buckets': [0] * (len(BUCKETS) + 1), 'count': 0, 'sum': 0.0,
+            }
+        histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += duration * 1000
+
+
+def _estimate(buckets, count, share):
+    # Верхняя граница корзины, в которую попал перцентиль
+    seen = 0
+    for bound, size in zip(BUCKETS + (None,), buckets):
+        seen += size
+        if seen >= share * count:
+            return bound
+    return None
+
+
+def histograms():
+    """Копия гистограмм процесса с оценками p50, p90 и p99 в мс
+    и итоги сжатия по типам содержимого."""
+    with _lock:
+        snapshot = {
+            name: dict(histogram, buckets=list(histogram['buckets']))
+            for name, histogram in _histograms.items()
+        }
+        compression = {
+            content_type: dict(
+                totals, ratio=totals['bytes'] / max(totals['compressed'], 1)
+            )
+            for content_type, totals in _compression.items()
+        }
+    for histogram in snapshot.values():
+        for share in (0.5, 0.9, 0.99):
+            histogram[f'p{round(share * 100)}'] = _estimate(
+                histogram['buckets'], histogram['count'], share
+            )
+    return {'bounds': BUCKETS, 'views': snapshot, 'compression': compression}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _compression.clear()
+
+
+class ServerTimingMiddleware:
+    """Добавляет Server-Timing к ответу и копит гистограммы задержек."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.metrics = metrics = Metrics()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        total = time.perf_counter() - started
+        response['Server-Timing'] = header(metrics, total)
+        match = request.resolver_match
+        observe(match.view_name if match else 'unresolved', total)
+        return response
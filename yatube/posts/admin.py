@@ -17,6 +17,13 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по индексу FTS5, а не LIKE '%...%' по всем постам
+        if not search_term:
+            return queryset, False
+        found = Post.objects.search(search_term).values('pk')
+        return queryset.filter(pk__in=found), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,398 @@
+"""
+Потоковый импорт и экспорт контента в JSONL и CSV: пользователи,
+группы, посты, комментарии и подписки. Строки читаются по одной
+и пишутся пачками bulk_create в транзакциях по IMPORT_CHUNK_SIZE строк,
+так что память не зависит от размера файла. Экспорт читает БД кусками
+и отдает строки генератором в том же формате, что понимает импорт.
+
+Ссылки в строках — естественные ключи: username автора, slug группы,
+id поста. Они переводятся в pk через карты, которые подгружаются
+из БД одним запросом на пачку. Пост сохраняет id из файла, если он
+свободен; если под этим id в базе другой пост, импортируемый получает
+новый pk, и его комментарии из того же запуска идут к нему.
+
+Уже существующие записи не пишутся повторно и считаются пропущенными,
+так что «записано» — число действительно вставленных строк.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache
+from .models import Comment, Follow, Group, Post, User
+from posts.settings import (EXPORT_CHUNK_SIZE, IMPORT_BATCH_SIZE,
+                            IMPORT_CHUNK_SIZE, IMPORT_MAP_LIMIT)
+
+# В порядке зависимостей: ссылаться можно только на уже загруженное
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+
+
+def read_rows(path):
+    """Строки файла как словари: CSV по расширению, иначе JSONL."""
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+FORMATS = ('jsonl', 'csv')
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, size)), [])
+
+
+class KeyMap:
+    """Естественный ключ -> pk, подгружается из БД по мере надобности.
+
+    Карта ограничена IMPORT_MAP_LIMIT ключами: при переполнении
+    она очищается, и все ключи пачки загружаются заново.
+    """
+
+    def __init__(self, queryset, field, convert=str, limit=IMPORT_MAP_LIMIT):
+        self.queryset = queryset
+        self.field = field
+        self.convert = convert
+        self.limit = limit
+        self.pks = {}
+
+    def load(self, keys):
+        needed = {self.convert(key) for key in keys if key}
+        missing = needed - self.pks.keys()
+        if not missing:
+            return
+        if len(self.pks) + len(missing) > self.limit:
+            # Уже загруженные ключи пачки пропали бы вместе с картой
+            self.pks.clear()
+            missing = needed
+        for batch in chunks(missing, IMPORT_BATCH_SIZE):
+            self.pks.update(self.queryset.filter(**{
+                f'{self.field}__in': batch
+            }).values_list(self.field, 'pk'))
+
+    def get(self, key):
+        return self.pks.get(self.convert(key)) if key else None
+
+
+class PostKeyMap(KeyMap):
+    """id поста из файла -> pk.
+
+    Обычно id из файла и есть pk. Посты, получившие при импорте
+    другой pk, запоминаются отдельно и не вытесняются при очистке карты.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.moved = {}
+
+    def remember(self, source_id, pk):
+        self.moved[self.convert(source_id)] = pk
+
+    def load(self, keys):
+        super().load(
+            key for key in keys
+            if not key or self.convert(key) not in self.moved
+        )
+
+    def get(self, key):
+        if key and self.convert(key) in self.moved:
+            return self.moved[self.convert(key)]
+        return super().get(key)
+
+
+def _date(row):
+    return row.get('pub_date') and parse_datetime(
+        row['pub_date']) or timezone.now()
+
+
+def _same_post(post, values):
+    author_id, text, pub_date = values
+    return (post.author_id, post.text, post.pub_date) == (
+        author_id, text, pub_date
+    )
+
+
+def place_posts(objs, maps):
+    """Посты для bulk_create и число сохраненных по одному.
+
+    Пост с id, который в базе занят другим постом, сохраняется
+    с новым pk, и карта постов запоминает замену. Уже загруженные
+    раньше посты пропускаются.
+    """
+    ids = [obj.pk for obj in objs if obj.pk]
+    existing = {
+        pk: values for pk, *values in Post.objects.filter(
+            pk__in=ids
+        ).values_list('pk', 'author_id', 'text', 'pub_date')
+    }
+    new, saved, seen = [], 0, set()
+    for obj in objs:
+        if obj.pk is None:
+            new.append(obj)
+            continue
+        if obj.pk in seen:
+            continue
+        seen.add(obj.pk)
+        if obj.pk not in existing:
+            new.append(obj)
+            continue
+        if _same_post(obj, existing[obj.pk]):
+            continue
+        source_id = obj.pk
+        copy = Post.objects.filter(
+            author_id=obj.author_id, pub_date=obj.pub_date, text=obj.text
+        ).values_list('pk', flat=True).first()
+        if copy is None:
+            obj.pk = None
+            obj.save()
+            saved += 1
+            copy = obj.pk
+        maps['posts'].remember(source_id, copy)
+    return new, saved
+
+
+def unique_only(fields):
+    """Отбрасывает объекты, которые уже есть в базе или повторяются."""
+    def place(objs, maps):
+        if not objs:
+            return objs, 0
+        model = type(objs[0])
+        keys = [tuple(getattr(obj, field) for field in fields)
+                for obj in objs]
+        seen = set(model.objects.filter(**{
+            f'{field}__in': {key[index] for key in keys}
+            for index, field in enumerate(fields)
+        }).values_list(*fields))
+        new = []
+        for obj, key in zip(objs, keys):
+            if key not in seen:
+                seen.add(key)
+                new.append(obj)
+        return new, 0
+    return place
+
+
+def build_user(row, maps):
+    return User(
+        username=row['username'],
+        first_name=row.get('first_name') or '',
+        last_name=row.get('last_name') or '',
+        email=row.get('email') or '',
+        # Пароль переносится только готовым хешем
+        password=row.get('password') or make_password(None),
+    )
+
+
+def build_group(row, maps):
+    return Group(
+        slug=row['slug'],
+        title=row.get('title') or row['slug'],
+        description=row.get('description') or '',
+    )
+
+
+def build_post(row, maps):
+    author_id = maps['users'].get(row.get('author'))
+    group_id = maps['groups'].get(row.get('group'))
+    if author_id is None or (row.get('group') and group_id is None):
+        return None
+    return Post(
+        id=row.get('id') or None,
+        text=row['text'],
+        author_id=author_id,
+        group_id=group_id,
+        image=row.get('image') or '',
+        pub_date=_date(row),
+    )
+
+
+def build_comment(row, maps):
+    post_id = maps['posts'].get(row.get('post'))
+    author_id = maps['users'].get(row.get('author'))
+    if post_id is None or author_id is None:
+        return None
+    return Comment(
+        post_id=post_id,
+        author_id=author_id,
+        text=row['text'],
+        pub_date=_date(row),
+    )
+
+
+def build_follow(row, maps):
+    user_id = maps['users'].get(row.get('user'))
+    author_id = maps['users'].get(row.get('author'))
+    if user_id is None or author_id is None or user_id == author_id:
+        return None
+    return Follow(user_id=user_id, author_id=author_id)
+
+
+def insert_all(objs, maps):
+    return objs, 0
+
+
+# Вид -> (модель, сборщик, {поле строки: карта}, отбор новых записей)
+IMPORTS = {
+    'users': (User, build_user, {}, unique_only(('username',))),
+    'groups': (Group, build_group, {}, unique_only(('slug',))),
+    'posts': (Post, build_post, {
+        'author': 'users', 'group': 'groups'
+    }, place_posts),
+    'comments': (Comment, build_comment, {
+        'post': 'posts', 'author': 'users'
+    }, insert_all),
+    'follows': (Follow, build_follow, {
+        'user': 'users', 'author': 'users'
+    }, unique_only(('user_id', 'author_id'))),
+}
+
+
+def key_maps():
+    return {
+        'users': KeyMap(User.objects.all(), 'username'),
+        'groups': KeyMap(Group.objects.all(), 'slug'),
+        'posts': PostKeyMap(Post.objects.all(), 'pk', int),
+    }
+
+
+@contextmanager
+def imported_dates(model):
+    """Сохраняет pub_date из файла вместо auto_now_add."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _scopes(obj):
+    # bulk_create не шлет сигналов: версии кеша поднимаем сами
+    if isinstance(obj, Post):
+        scopes = ['index', f'author:{obj.author_id}']
+        scopes += [f'group:{obj.group_id}'] if obj.group_id else []
+        return scopes + ([f'post:{obj.pk}'] if obj.pk else [])
+    if isinstance(obj, Comment):
+        return [f'post:{obj.post_id}', f'author:{obj.author_id}']
+    if isinstance(obj, Follow):
+        return [f'follows:{obj.author_id}', f'follows:{obj.user_id}']
+    return []
+
+
+def import_rows(kind, rows, maps, chunk_size=IMPORT_CHUNK_SIZE,
+                batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Загружает строки вида kind, возвращает (записано, пропущено).
+
+    Строки с неизвестными ссылками и уже существующие записи
+    пропускаются.
+    """
+    model, build, references, place = IMPORTS[kind]
+    # Поля, ссылающиеся на одну карту, грузятся одним вызовом:
+    # иначе переполнение на втором поле стерло бы ключи первого
+    fields_by_map = {}
+    for field, name in references.items():
+        fields_by_map.setdefault(name, []).append(field)
+    written = skipped = 0
+    for chunk in chunks(rows, chunk_size):
+        for name, fields in fields_by_map.items():
+            maps[name].load(
+                row.get(field) for row in chunk for field in fields
+            )
+        objs = [obj for obj in (build(row, maps) for row in chunk) if obj]
+        with transaction.atomic(), imported_dates(model):
+            new, saved = place(objs, maps)
+            # ignore_conflicts — только от гонки с параллельной записью
+            model.objects.bulk_create(
+                new, batch_size=batch_size, ignore_conflicts=True
+            )
+        feed_cache.bump(*{
+            scope for obj in new for scope in _scopes(obj)
+        })
+        written += len(new) + saved
+        skipped += len(chunk) - len(new) - saved
+        if progress is not None:
+            progress(kind, written, skipped)
+    return written, skipped
+
+
+# Вид -> (queryset, {поле строки: путь в values()}, фильтр по пользователю)
+EXPORTS = {
+    'users': (User.objects.all(), {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+    }, 'pk'),
+    'groups': (Group.objects.all(), {
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    }, 'posts__author'),
+    'posts': (Post.objects.all(), {
+        'id': 'pk',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    }, 'author'),
+    'comments': (Comment.objects.all(), {
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    }, 'author'),
+    'follows': (Follow.objects.all(), {
+        'user': 'user__username',
+        'author': 'author__username',
+    }, 'user'),
+}
+
+
+def export_rows(kind, user=None):
+    """Строки вида kind, всего сайта или только данные пользователя."""
+    queryset, fields, owner = EXPORTS[kind]
+    if user is not None:
+        queryset = queryset.filter(**{owner: user}).distinct()
+    for values in queryset.order_by('pk').values_list(
+        *fields.values()
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            field: value.isoformat() if hasattr(value, 'isoformat') else value
+            for field, value in zip(fields, values)
+        }
+
+
+class _Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(kind, fmt, user=None):
+    """Строки файла экспорта в формате fmt из FORMATS."""
+    rows = export_rows(kind, user)
+    if fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORTS[kind][1])
+    for row in rows:
+        yield writer.writerow(row.values())
@@ -0,0 +1,139 @@
+"""
+Синтетические данные для замеров производительности.
+
+Пользователи, группы, посты с картинками, комментарии и граф подписок
+со степенным распределением: немногие авторы пишут больше всех
+и собирают почти всех подписчиков, немногие посты собирают почти все
+комментарии. Строки генерируются в формате импорта и пишутся через
+bulk.import_rows, поэтому память не зависит от объема.
+"""
+import random
+import sqlite3
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from . import bulk
+from .models import Group, Post, User
+from posts.settings import (DATASET_EXPONENT, DATASET_GROUP_SHARE,
+                            DATASET_IMAGE_SHARE)
+
+YEAR = timedelta(days=365).total_seconds()
+
+
+def power_law(size, exponent=DATASET_EXPONENT):
+    """Накопленные веса для random.choices: вес k-го ~ 1 / k^exponent."""
+    return list(accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)
+    ))
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def make_images(count, rng, prefix):
+    """Сохраняет count картинок-заглушек, возвращает их имена."""
+    names = []
+    for number in range(count):
+        image = Image.new('RGB', (1200, 800), tuple(
+            rng.randrange(256) for _ in range(3)
+        ))
+        draw = ImageDraw.Draw(image)
+        for _ in range(20):
+            x, y = rng.randrange(1200), rng.randrange(800)
+            draw.ellipse(
+                (x, y, x + rng.randrange(50, 400), y + rng.randrange(50, 400)),
+                fill=tuple(rng.randrange(256) for _ in range(3))
+            )
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        names.append(default_storage.save(
+            f'posts/{prefix}{number}.jpg', ContentFile(buffer.getvalue())
+        ))
+    return names
+
+
+def generate(users, groups, posts, comments, follows, images=0, seed=None,
+             progress=None):
+    """Добавляет синтетические данные, возвращает {вид: записано}."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    first_user, first_group, first_post = (
+        _next_pk(User), _next_pk(Group), _next_pk(Post)
+    )
+    usernames = [
+        f'{fake.user_name()}_{first_user + number}' for number in range(users)
+    ]
+    slugs = [f'group-{first_group + number}' for number in range(groups)]
+    post_ids = range(first_post, first_post + posts)
+    image_names = make_images(images, rng, f'dataset_{first_post}_')
+    authors = power_law(users)
+    viral = power_law(posts)
+    now = timezone.now()
+    rows = {
+        'users': ({
+            'username': username,
+            'first_name': fake.first_name(),
+            'last_name': fake.last_name(),
+            'email': fake.email(),
+        } for username in usernames),
+        'groups': ({
+            'slug': slug,
+            'title': fake.sentence(nb_words=3)[:200],
+            'description': fake.paragraph(),
+        } for slug in slugs),
+        'posts': ({
+            'id': post_id,
+            'author': rng.choices(usernames, cum_weights=authors)[0],
+            'group': slugs and rng.random() < DATASET_GROUP_SHARE
+            and rng.choice(slugs) or None,
+            'image': image_names and rng.random() < DATASET_IMAGE_SHARE
+            and rng.choice(image_names) or '',
+            'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            'pub_date': (
+                now - timedelta(seconds=rng.uniform(0, YEAR))
+            ).isoformat(),
+        } for post_id in post_ids),
+        'comments': ({
+            'post': post_ids[
+                rng.choices(range(posts), cum_weights=viral)[0]
+            ],
+            'author': rng.choice(usernames),
+            'text': fake.sentence(),
+            'pub_date': (
+                now - timedelta(seconds=rng.uniform(0, YEAR))
+            ).isoformat(),
+        } for _ in range(comments if posts else 0)),
+        'follows': ({
+            'user': rng.choice(usernames),
+            'author': rng.choices(usernames, cum_weights=authors)[0],
+        } for _ in range(follows if users else 0)),
+    }
+    maps = bulk.key_maps()
+    return {
+        kind: bulk.import_rows(kind, rows[kind], maps, progress=progress)[0]
+        for kind in bulk.KINDS
+    }
+
+
+def snapshot(path):
+    """Копирует текущую базу SQLite в файл средствами backup API."""
+    # Внутри незавершенной транзакции backup ждет ее бесконечно
+    if connection.in_atomic_block:
+        raise RuntimeError('Снимок базы нельзя сделать внутри транзакции')
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
@@ -0,0 +1,99 @@
+"""
+Версии кешированных лент. Фрагменты шаблонов живут без таймаута
+и ключуются версией своей области (вся лента, группа, автор, пост).
+Запись поста или комментария поднимает версию, после чего старые
+фрагменты больше не читаются и вытесняются кешем сами.
+
+Те же версии служат валидатором ETag страниц: пока версии не изменились,
+браузер получает 304 без рендеринга шаблона.
+
+С репликами версия живет дольше данных на реплике: пока область
+менялась в пределах DATABASE_STICKY_SECONDS, чтения запроса идут
+в основную базу, чтобы под новой версией не закешировать старое.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core import routers
+
+VERSION_KEY = 'posts:version:{}'
+BUMPED_KEY = 'posts:bumped:{}'
+
+
+def _fresh():
+    # Версия с отметкой времени не совпадет с версиями до очистки кеша
+    return int(time.time() * 1000)
+
+
+def versions(*scopes):
+    """Строка с текущими версиями областей для ключа фрагмента."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    if routers.replicas():
+        bumped = [BUMPED_KEY.format(scope) for scope in scopes]
+        current = cache.get_many(keys + bumped)
+        if any(key in current for key in bumped):
+            routers.pin()
+    else:
+        current = cache.get_many(keys)
+    for key in keys:
+        if key not in current:
+            cache.add(key, _fresh(), None)
+            current[key] = cache.get(key)
+    return '|'.join(
+        f'{scope}={current[key]}' for scope, key in zip(scopes, keys)
+    )
+
+
+def bump(*scopes):
+    """Инвалидирует все фрагменты перечисленных областей.
+
+    Внутри транзакции версии поднимаются еще раз после коммита:
+    читатель, взявший новую версию до коммита, не видел новых строк
+    и мог закешировать под ней старый фрагмент.
+    """
+    _bump(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh(), None)
+    if routers.replicas():
+        cache.set_many(
+            {BUMPED_KEY.format(scope): True for scope in scopes},
+            routers.sticky_seconds()
+        )
+
+
+def post_scopes(post, *group_ids):
+    """Области, в которых виден пост."""
+    scopes = ['index', f'author:{post.author_id}', f'post:{post.pk}']
+    scopes += [
+        f'group:{group_id}'
+        for group_id in {post.group_id, *group_ids} if group_id
+    ]
+    return scopes
+
+
+def etag(request, *scopes):
+    """ETag страницы: версии областей, адрес страницы и зритель.
+
+    Страницы персональны (шапка, подписка, форма с CSRF-токеном),
+    поэтому в валидатор входят пользователь и CSRF-cookie.
+    """
+    validator = '|'.join((
+        versions(*scopes),
+        request.get_full_path(),
+        str(request.user.pk),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ))
+    return hashlib.md5(validator.encode()).hexdigest()
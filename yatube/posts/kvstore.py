@@ -0,0 +1,107 @@
+"""
+Kvstore sorl-thumbnail поверх cached_db, рассчитанный на ленту.
+
+Записи изображений из хранилища по умолчанию хранятся компактным
+списком [имя, ширина, высота]: такая запись короче и читается без
+импорта класса хранилища на каждую карточку. Ключи по префиксу ищутся
+диапазоном по первичному ключу — startswith в SQLite становится LIKE,
+который индекс не использует.
+"""
+import json
+
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.helpers import deserialize, serialize
+from sorl.thumbnail.images import (ImageFile, deserialize_image_file,
+                                   serialize_image_file)
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import \
+    KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+# Больше любого символа ключа: граница диапазона ключей с префиксом
+PREFIX_END = '\U0010ffff'
+
+
+def _decode(value, identity):
+    if identity != 'image':
+        return deserialize(value)
+    if not value.startswith('['):
+        return deserialize_image_file(value)
+    name, width, height = json.loads(value)
+    image_file = ImageFile(name, default.storage)
+    image_file.set_size((width, height))
+    return image_file
+
+
+def _encode(value, identity):
+    if identity != 'image':
+        return serialize(value)
+    if value.serialize_storage() != settings.THUMBNAIL_STORAGE:
+        return serialize_image_file(value)
+    return json.dumps([value.name, *value.size], separators=(',', ':'))
+
+
+class KVStore(CachedDBKVStore):
+    def _get(self, key, identity='image'):
+        value = self._get_raw(add_prefix(key, identity))
+        return _decode(value, identity) if value else None
+
+    def _set(self, key, value, identity='image'):
+        self._set_raw(add_prefix(key, identity), _encode(value, identity))
+
+    def _delete_raw(self, *keys):
+        KVStoreModel.objects.filter(key__in=keys).delete()
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        return KVStoreModel.objects.filter(
+            key__gte=prefix, key__lt=prefix + PREFIX_END
+        ).order_by('key').values_list('key', flat=True)
+
+    def _load(self, keys, identity):
+        """Значения ключей прямо из БД, мимо кеша."""
+        rows = KVStoreModel.objects.filter(
+            key__in=[add_prefix(key, identity) for key in keys]
+        ).values_list('key', 'value')
+        return {
+            del_prefix(raw_key): _decode(value, identity)
+            for raw_key, value in rows if value
+        }
+
+    def existing(self, keys, identity='image'):
+        """Ключи из keys, записи которых есть в БД."""
+        return {
+            del_prefix(key) for key in KVStoreModel.objects.filter(
+                key__in=[add_prefix(key, identity) for key in keys]
+            ).values_list('key', flat=True)
+        }
+
+    def sources(self, batch_size):
+        """Пачки исходников с миниатюрами: (ключ, исходник, миниатюры).
+
+        Исходник None, если его запись пропала; миниатюры — словарь
+        ключ -> ImageFile или None. Ключи перебираются по индексу
+        от последнего прочитанного, так что пачки можно удалять на ходу.
+        """
+        prefix = add_prefix('', 'thumbnails')
+        last = prefix
+        while True:
+            keys = [del_prefix(key) for key in KVStoreModel.objects.filter(
+                key__gt=last, key__lt=prefix + PREFIX_END
+            ).order_by('key').values_list('key', flat=True)[:batch_size]]
+            if not keys:
+                return
+            last = add_prefix(keys[-1], 'thumbnails')
+            lists = self._load(keys, 'thumbnails')
+            sources = self._load(keys, 'image')
+            thumbnails = self._load(
+                {key for value in lists.values() for key in value}, 'image'
+            )
+            yield [
+                (key, sources.get(key), {
+                    thumbnail: thumbnails.get(thumbnail)
+                    for thumbnail in lists.get(key, ())
+                })
+                for key in keys
+            ]
@@ -0,0 +1,48 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings
+
+from posts import thumbnails
+from posts.models import Post
+from posts.settings import MEDIA_GC_BATCH_SIZE, MEDIA_GC_GRACE
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет миниатюры и оригиналы изображений, '
+        'на которые больше не ссылаются посты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=MEDIA_GC_BATCH_SIZE,
+            help='Сколько записей kvstore и файлов обрабатывать за раз'
+        )
+        parser.add_argument(
+            '--grace', type=int, default=MEDIA_GC_GRACE,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удаляя'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        doomed, sources = thumbnails.collect_garbage(batch_size, dry_run)
+        cached = thumbnails.delete_files(
+            default.storage, settings.THUMBNAIL_PREFIX,
+            lambda names: thumbnails.live_thumbnails(names, doomed),
+            options['grace'], batch_size, dry_run
+        )
+        originals = thumbnails.delete_files(
+            default_storage, Post._meta.get_field('image').upload_to,
+            thumbnails.referenced, options['grace'], batch_size, dry_run
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Будет удалено" if dry_run else "Удалено"}: '
+            f'исходников в kvstore {sources}, файлов миниатюр {cached}, '
+            f'оригиналов {originals}'
+        ))
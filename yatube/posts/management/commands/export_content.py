@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulk
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в файлы JSONL или CSV, которые понимает import_content'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds', nargs='*', metavar='KIND',
+            help=f'Что выгружать: {", ".join(bulk.KINDS)}; по умолчанию все'
+        )
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS, default='jsonl',
+            help='Формат файлов'
+        )
+        parser.add_argument(
+            '--user', metavar='USERNAME',
+            help='Выгрузить только данные этого пользователя'
+        )
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='Каталог для файлов <вид>.<формат>'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['kinds']) - set(bulk.KINDS)
+        if unknown:
+            raise CommandError(f'Неизвестные виды: {", ".join(unknown)}')
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден'
+                )
+        fmt = options['format']
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for kind in options['kinds'] or bulk.KINDS:
+            path = os.path.join(options['output_dir'], f'{kind}.{fmt}')
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.writelines(bulk.export_lines(kind, fmt, user))
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {path}'))
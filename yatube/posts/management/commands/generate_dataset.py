@@ -0,0 +1,47 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts import dataset, timelines
+
+
+class Command(BaseCommand):
+    help = (
+        'Добавляет синтетических пользователей, группы, посты, '
+        'комментарии и подписки и при желании сохраняет снимок базы'
+    )
+
+    def add_arguments(self, parser):
+        for kind, default in (
+            ('users', 1000), ('groups', 20), ('posts', 10000),
+            ('comments', 30000), ('follows', 20000), ('images', 50),
+        ):
+            parser.add_argument(
+                f'--{kind}', type=int, default=default,
+                help=f'Сколько создать ({kind}), по умолчанию {default}'
+            )
+        parser.add_argument(
+            '--seed', type=int, help='Зерно генератора для повторяемости'
+        )
+        parser.add_argument(
+            '--snapshot', metavar='FILE',
+            help='Сохранить копию базы SQLite для замеров'
+        )
+
+    def handle(self, *args, **options):
+        written = dataset.generate(
+            options['users'], options['groups'], options['posts'],
+            options['comments'], options['follows'], options['images'],
+            seed=options['seed'], progress=self.progress,
+        )
+        timelines.rebuild()
+        call_command('reconcile_author_stats', stdout=self.stdout)
+        for kind, count in written.items():
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {count}'))
+        if options['snapshot']:
+            dataset.snapshot(options['snapshot'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Снимок базы: {options["snapshot"]}'
+            ))
+
+    def progress(self, kind, written, skipped):
+        self.stdout.write(f'{kind}: {written}')
@@ -0,0 +1,25 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры всех размеров для изображений постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — в текущем процессе'
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct().iterator()
+        done = thumbnails.generate_all(names, options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы для изображений: {done}'
+        ))
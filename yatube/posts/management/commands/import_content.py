@@ -0,0 +1,56 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts import bulk, timelines
+from posts.settings import IMPORT_BATCH_SIZE, IMPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей, группы, посты, комментарии и подписки '
+        'из файлов JSONL или CSV'
+    )
+
+    def add_arguments(self, parser):
+        for kind in bulk.KINDS:
+            parser.add_argument(
+                f'--{kind}', metavar='FILE',
+                help=f'Файл с {kind}: .csv или JSONL'
+            )
+        parser.add_argument(
+            '--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+            help='Сколько строк записывать в одной транзакции'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Сколько строк в одном INSERT'
+        )
+
+    def handle(self, *args, **options):
+        maps = bulk.key_maps()
+        self.started = time.monotonic()
+        kinds = [kind for kind in bulk.KINDS if options[kind]]
+        for kind in kinds:
+            written, skipped = bulk.import_rows(
+                kind, bulk.read_rows(options[kind]), maps,
+                chunk_size=options['chunk_size'],
+                batch_size=options['batch_size'],
+                progress=self.progress,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: записано {written}, пропущено {skipped}'
+            ))
+        # bulk_create обходит сигналы: ленты и счетчики пересобираем
+        if {'posts', 'follows'} & set(kinds):
+            timelines.rebuild()
+        if {'posts', 'comments', 'follows'} & set(kinds):
+            call_command('reconcile_author_stats', stdout=self.stdout)
+
+    def progress(self, kind, written, skipped):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'{kind}: {written + skipped} строк, '
+            f'{(written + skipped) / max(elapsed, 1e-6):.0f} строк/с'
+        )
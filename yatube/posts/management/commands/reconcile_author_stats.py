@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import stats
+from posts.models import User
+from posts.settings import STATS_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики AuthorStats и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=STATS_BATCH_SIZE,
+            help='Сколько пользователей пересчитывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = checked = 0
+        last_pk = 0
+        while True:
+            user_ids = list(User.objects.filter(
+                pk__gt=last_pk
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            with transaction.atomic():
+                fixed += stats.reconcile(user_ids)
+            checked += len(user_ids)
+            last_pk = user_ids[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено авторов: {checked}, исправлено: {fixed}'
+        ))
@@ -1,6 +1,9 @@
 from core.models import GenerationModel
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.expressions import RawSQL
+
+from .search import FTS_TABLE, MARK_END, MARK_START, match
 
 User = get_user_model()
 
@@ -26,6 +29,54 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    FEED_FIELDS = (
+        'text', 'pub_date', 'image',
+        'author', 'author__username',
+        'author__first_name', 'author__last_name',
+        'group', 'group__slug', 'group__title',
+    )
+
+    def feed(self):
+        """Посты для карточек ленты: автор и группа одним запросом."""
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
+    def timeline(self, user):
+        """Лента подписок из материализованной таблицы Timeline.
+
+        Ключи сортировки берутся из Timeline, чтобы выборка шла по индексу
+        (user, -pub_date, -post) без сортировки постов.
+        """
+        return self.feed().filter(timelines__user=user).annotate(
+            feed_date=models.F('timelines__pub_date'),
+            feed_post=models.F('timelines__post'),
+        )
+
+    def search(self, query, snippet_tokens=24):
+        """Посты, найденные индексом FTS5, с рангом rank и фрагментом
+        snippet. Чем больше rank, тем выше пост в выдаче."""
+        expression = match(query)
+        if not expression:
+            return self.none()
+        return self.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE} MATCH %s',
+                f'{FTS_TABLE}.rowid = {self.model._meta.db_table}.id',
+            ],
+            params=[expression],
+        ).annotate(
+            rank=RawSQL(
+                f'-bm25({FTS_TABLE})', (), output_field=models.FloatField()
+            ),
+            snippet=RawSQL(
+                f"snippet({FTS_TABLE}, 0, %s, %s, '…', %s)",
+                (MARK_START, MARK_END, snippet_tokens),
+                output_field=models.TextField(),
+            ),
+        ).order_by('-rank', '-pk')
+
+
 class Post(GenerationModel):
     group = models.ForeignKey(
         Group,
@@ -42,9 +93,22 @@ class Post(GenerationModel):
     )
     RETURN_STR = '{}, {}'
 
+    objects = PostQuerySet.as_manager()
+
     class Meta(GenerationModel.Meta):
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты группы и автора: фильтр и сортировка ленты одним индексом
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.RETURN_STR.format(super().__str__(), self.group)
@@ -63,6 +127,12 @@ class Comment(GenerationModel):
     class Meta(GenerationModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('post', '-pub_date', '-id'),
+                name='comment_post_feed_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -93,8 +163,93 @@ class Follow(models.Model):
                 name="self follow is not accessed"
             )
         ]
+        # unique_follow начинается с author и не годится для поиска
+        # подписок пользователя
+        indexes = [
+            models.Index(
+                fields=('user', 'author'),
+                name='follow_user_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.RETURN_STR.format(
             self.user.get_username(), self.author.get_username()
         )
+
+
+class Timeline(models.Model):
+    """Материализованная лента подписок: пост автора у каждого подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timelines',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+    RETURN_STR = 'user={} post={}'
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_feed_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.RETURN_STR.format(self.user_id, self.post_id)
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики автора для профиля и страницы поста."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+    COUNTERS = (
+        'posts_count', 'followers_count', 'following_count', 'comments_count'
+    )
+    RETURN_STR = 'user={} posts={}'
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return self.RETURN_STR.format(self.user_id, self.posts_count)
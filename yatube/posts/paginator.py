@@ -0,0 +1,153 @@
+"""
+Keyset-пагинация лент: страница выбирается не по OFFSET,
+а по значениям ключей сортировки последнего показанного поста.
+"""
+import base64
+import binascii
+import collections.abc
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключей в непрозрачную строку."""
+    raw = json.dumps([direction] + [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Возвращает (направление, значения) или None для битого курсора."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, *values = json.loads(raw)
+    except (TypeError, ValueError, binascii.Error):
+        return None
+    if direction not in (NEXT, PREVIOUS) or len(values) != size:
+        return None
+    return direction, values
+
+
+class LazyRows(collections.abc.Sequence):
+    """Посты страницы, которые читаются из БД при первом обращении."""
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+
+    @cached_property
+    def _result(self):
+        return self._fetch()
+
+    @property
+    def has_next(self):
+        return self._result[1]
+
+    @property
+    def has_previous(self):
+        return self._result[2]
+
+    def __len__(self):
+        return len(self._result[0])
+
+    def __getitem__(self, index):
+        return self._result[0][index]
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключам (pub_date, id) без COUNT и OFFSET.
+
+    Все ключи сортируются по убыванию, последний ключ должен быть
+    уникальным. Ключами могут быть и аннотации queryset. Номерные
+    страницы (`get_page`) по-прежнему доступны, чтобы не ломать старые
+    ссылки вида `?page=N`.
+    """
+    keys = ('pub_date', 'pk')
+
+    def __init__(self, object_list, per_page, keys=None, **kwargs):
+        if keys is not None:
+            self.keys = tuple(keys)
+        super().__init__(
+            object_list.order_by(*(f'-{key}' for key in self.keys)),
+            per_page,
+            **kwargs
+        )
+
+    def get_cursor_page(self, cursor=None):
+        """Страница после (или перед) курсором; битый курсор — первая.
+
+        Запрос к БД откладывается до первого обращения к постам страницы
+        или к курсорам соседних страниц: если лента взята из кеша
+        фрагментов, страница не стоит ни одного запроса.
+        """
+        decoded = self._check(
+            decode_cursor(str(cursor), len(self.keys)) if cursor else None
+        )
+        rows = LazyRows(lambda: self._fetch(decoded))
+        # Страница остается обычным Page: шаблоны и тесты проверяют тип,
+        # а курсоры соседних страниц передаются атрибутами.
+        page = self._get_page(rows, None, self)
+        page.cursor = str(cursor) if decoded else ''
+        page.next_cursor = SimpleLazyObject(lambda: encode_cursor(
+            NEXT, self._values(rows[-1])
+        ) if rows.has_next else '')
+        page.previous_cursor = SimpleLazyObject(lambda: encode_cursor(
+            PREVIOUS, self._values(rows[0])
+        ) if rows.has_previous and len(rows) else '')
+        return page
+
+    def _check(self, decoded):
+        """Курсор, значения которого годятся для фильтра, иначе None.
+
+        Курсор можно подделать: вместо даты или id в нем может оказаться
+        что угодно, и ошибка фильтра не должна ронять ленту.
+        """
+        if decoded is None:
+            return None
+        try:
+            self.object_list.filter(self._seek(decoded[1], 'lt'))
+        except (ValidationError, TypeError, ValueError):
+            return None
+        return decoded
+
+    def _fetch(self, decoded):
+        """Возвращает (посты, есть ли следующая, есть ли предыдущая)."""
+        if decoded is None:
+            rows = list(self.object_list[:self.per_page + 1])
+            return rows[:self.per_page], len(rows) > self.per_page, False
+        direction, values = decoded
+        if direction == NEXT:
+            rows = list(self.object_list.filter(
+                self._seek(values, 'lt')
+            )[:self.per_page + 1])
+            return rows[:self.per_page], len(rows) > self.per_page, True
+        rows = list(self.object_list.filter(
+            self._seek(values, 'gt')
+        ).reverse()[:self.per_page + 1])
+        if not rows:
+            return self._fetch(None)
+        return rows[:self.per_page][::-1], True, len(rows) > self.per_page
+
+    def _values(self, obj):
+        # Страницы строятся и из моделей, и из строк values()
+        if isinstance(obj, dict):
+            return [obj[key] for key in self.keys]
+        return [getattr(obj, key) for key in self.keys]
+
+    def _seek(self, values, lookup):
+        """Условие «строго после значений» в порядке сортировки ключей."""
+        condition = Q()
+        for index, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[index]})
+            for prev_key, prev_value in zip(self.keys[:index], values):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        return condition
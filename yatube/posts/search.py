@@ -0,0 +1,34 @@
+"""
+Полнотекстовый поиск по постам на индексе SQLite FTS5.
+
+posts_post_fts хранит только инвертированный индекс по тексту постов
+(external content) и обновляется триггерами на posts_post, так что
+индекс в синхроне при любой записи: save, delete, bulk_create, update.
+"""
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'posts_post_fts'
+# Границы найденных слов во фрагменте; в тексте постов их не бывает
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def match(query):
+    """Запрос пользователя как выражение MATCH: все слова, как есть.
+
+    Каждое слово берется в кавычки, чтобы синтаксис FTS5 в запросе
+    не приводил к ошибке.
+    """
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def highlight(snippet):
+    """Экранированный фрагмент с найденными словами в <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
@@ -3,6 +3,43 @@
 """
 
 COUNT_POST_ON_PAGE = 10
+COUNT_COMMENTS_ON_PAGE = 20
+
+# Пачка записей ленты подписок при раскладке и пересборке
+TIMELINE_BATCH_SIZE = 500
+# Сколько пользователей пересчитывать за раз при сверке AuthorStats
+STATS_BATCH_SIZE = 1000
+# Миниатюры, которые используют шаблоны: имя -> (геометрия, опции sorl)
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Ширины адаптивных вариантов миниатюр для srcset и их атрибут sizes
+THUMBNAIL_WIDTHS = {'card': (320, 640, 960)}
+THUMBNAIL_LAYOUT = {'card': '(max-width: 960px) 100vw, 960px'}
+# Дополнительные форматы вариантов; те, что не умеет Pillow, пропускаются
+THUMBNAIL_FORMATS = ('WEBP',)
+# Процессы пула миниатюр; 0 — создавать миниатюры прямо в запросе
+THUMBNAIL_WORKERS = 2
+# Сборка мусора в media: пачка записей kvstore и сколько секунд
+# не трогать свежие файлы, для которых запись еще не успела появиться
+MEDIA_GC_BATCH_SIZE = 500
+MEDIA_GC_GRACE = 60 * 60
+# Импорт контента: строк в одном bulk_create, строк в одной транзакции
+# и сколько ключей держать в картах внешних ключей
+IMPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 10000
+IMPORT_MAP_LIMIT = 100000
+# Экспорт: сколько строк читать из БД за раз
+EXPORT_CHUNK_SIZE = 2000
+# Синтетические данные: показатель степенного распределения подписчиков
+# и активности авторов, доля постов в группах и с картинками
+DATASET_EXPONENT = 1.2
+DATASET_GROUP_SHARE = 0.7
+DATASET_IMAGE_SHARE = 0.3
+# Ключи keyset-пагинации ленты подписок (аннотации Post.objects.timeline)
+FEED_KEYS = ('feed_date', 'feed_post')
+# Ключи keyset-пагинации поиска (аннотации Post.objects.search)
+SEARCH_KEYS = ('rank', 'pk')
 
 POST_INDEX_HTML = 'posts/index.html'
 POST_GROUP_LIST_HTML = 'posts/group_list.html'
@@ -12,3 +49,5 @@ POST_DETAIL_HTML = 'posts/post_detail.html'
 POST_CREATE_HTML = 'posts/post_create.html'
 ERROR_HTML = 'core/404.html'
 FOLLOW_HTML = 'posts/follow.html'
+POST_SEARCH_HTML = 'posts/search.html'
+POST_COMMENTS_HTML = 'posts/includes/comment_list.html'
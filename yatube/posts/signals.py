@@ -0,0 +1,107 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feed_cache, stats, timelines
+from .models import Comment, Follow, Group, Post, User
+
+# Поля автора, которые выводятся во фрагментах лент
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # При смене группы кеш нужно сбросить и у прежней группы
+    instance._old_group_id = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    feed_cache.bump(*feed_cache.post_scopes(
+        instance, getattr(instance, '_old_group_id', None)
+    ))
+    if created:
+        timelines.fan_out(instance)
+        stats.bump(instance.author_id, created, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    feed_cache.bump(*feed_cache.post_scopes(instance))
+    stats.bump(instance.author_id, False, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    # В профиле комментатора выводится число его комментариев
+    feed_cache.bump(f'post:{instance.post_id}', f'author:{instance.author_id}')
+    if created:
+        stats.bump(instance.author_id, created, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    feed_cache.bump(f'post:{instance.post_id}', f'author:{instance.author_id}')
+    stats.bump(instance.author_id, False, comments_count=-1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # Название и slug группы выводятся и в ленте, и в профилях авторов
+    author_ids = Post.objects.filter(group=instance).values_list(
+        'author_id', flat=True).distinct()
+    feed_cache.bump(
+        'index', f'group:{instance.pk}',
+        *(f'author:{author_id}' for author_id in author_ids)
+    )
+
+
+@receiver(pre_save, sender=User)
+def author_saving(sender, instance, update_fields=None, **kwargs):
+    # Вход в систему сохраняет только last_login: ленты не трогаем
+    instance._author_renamed = False
+    if instance.pk is None or (
+            update_fields and not set(update_fields) & set(AUTHOR_FIELDS)):
+        return
+    old = User.objects.filter(pk=instance.pk).values_list(
+        *AUTHOR_FIELDS).first()
+    instance._author_renamed = old is not None and old != tuple(
+        getattr(instance, field) for field in AUTHOR_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, **kwargs):
+    if not getattr(instance, '_author_renamed', False):
+        return
+    group_ids = instance.posts.exclude(group=None).values_list(
+        'group_id', flat=True).distinct()
+    feed_cache.bump(
+        'index', f'author:{instance.pk}',
+        *(f'group:{group_id}' for group_id in group_ids)
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    # У автора меняется число подписчиков, у подписчика — подписок
+    feed_cache.bump(
+        f'follows:{instance.author_id}', f'follows:{instance.user_id}'
+    )
+    if created:
+        timelines.backfill(instance.user_id, instance.author_id)
+        stats.bump(instance.author_id, created, followers_count=1)
+        stats.bump(instance.user_id, created, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    feed_cache.bump(
+        f'follows:{instance.author_id}', f'follows:{instance.user_id}'
+    )
+    timelines.trim(instance.user_id, instance.author_id)
+    stats.bump(instance.author_id, False, followers_count=-1)
+    stats.bump(instance.user_id, False, following_count=-1)
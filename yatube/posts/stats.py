@@ -0,0 +1,78 @@
+"""
+Счетчики AuthorStats: атомарные приращения на запись
+и пересчет из исходных таблиц для исправления расхождений.
+"""
+from django.db.models import Count, F
+
+from .models import AuthorStats, Comment, Follow, Post
+
+# Счетчик -> (модель, поле пользователя, по которому считаем)
+SOURCES = {
+    'posts_count': (Post, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+    'comments_count': (Comment, 'author_id'),
+}
+
+
+def bump(user_id, created, **deltas):
+    """Сдвигает счетчики одним UPDATE ... SET x = x + delta.
+
+    Если строки еще нет, при создании объекта она считается с нуля;
+    при удалении отсутствующую строку не создаем: пользователь может
+    удаляться каскадом вместе со своей статистикой.
+    """
+    rows = AuthorStats.objects.filter(user_id=user_id)
+    for name, delta in deltas.items():
+        if delta < 0:
+            # Разошедшийся счетчик не уводим ниже нуля
+            rows = rows.filter(**{f'{name}__gte': -delta})
+    updated = rows.update(**{
+        name: F(name) + delta for name, delta in deltas.items()
+    })
+    if not updated and created:
+        reconcile([user_id])
+
+
+def count(user_ids):
+    """Настоящие значения счетчиков для пачки пользователей."""
+    result = {
+        user_id: dict.fromkeys(AuthorStats.COUNTERS, 0)
+        for user_id in user_ids
+    }
+    for name, (model, field) in SOURCES.items():
+        for user_id, total in model.objects.filter(**{
+            f'{field}__in': user_ids
+        }).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values_list(field, 'total'):
+            result[user_id][name] = total
+    return result
+
+
+def reconcile(user_ids):
+    """Пересчитывает счетчики пачки, возвращает число исправленных строк."""
+    actual = count(user_ids)
+    existing = AuthorStats.objects.in_bulk(user_ids)
+    missing, changed = [], []
+    for user_id, values in actual.items():
+        stats = existing.get(user_id)
+        if stats is None:
+            missing.append(AuthorStats(user_id=user_id, **values))
+        elif any(getattr(stats, name) != value
+                 for name, value in values.items()):
+            for name, value in values.items():
+                setattr(stats, name, value)
+            changed.append(stats)
+    AuthorStats.objects.bulk_create(missing, ignore_conflicts=True)
+    AuthorStats.objects.bulk_update(changed, AuthorStats.COUNTERS)
+    return len(missing) + len(changed)
+
+
+def for_user(user):
+    """Статистика автора одним запросом (или из select_related)."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        reconcile([user.pk])
+        return AuthorStats.objects.get(user_id=user.pk)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import search
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    """Фрагмент найденного поста с подсветкой совпадений."""
+    return search.highlight(snippet)
@@ -0,0 +1,16 @@
+from core import timing
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_picture(image, size):
+    """Готовые варианты миниатюры или None: в запросе картинки
+    не обрабатываются."""
+    if not image:
+        return None
+    with timing.span('thumb'):
+        return thumbnails.picture(image, size)
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import bulk
+from ..models import AuthorStats, Comment, Follow, Group, Post, Timeline, User
+
+
+class ImportContentTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        User.objects.create_user(username='existing')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, name, rows):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            if name.endswith('.csv'):
+                file.write(','.join(rows[0]) + '\n')
+                for row in rows:
+                    file.write(','.join(map(str, row.values())) + '\n')
+            else:
+                for row in rows:
+                    file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    def test_import_resolves_references(self):
+        out = StringIO()
+        call_command(
+            'import_content',
+            users=self.write('users.csv', [
+                {'username': 'author', 'first_name': 'Лев'},
+                {'username': 'reader', 'first_name': 'Анна'},
+            ]),
+            groups=self.write('groups.jsonl', [
+                {'slug': 'books', 'title': 'Книги'},
+            ]),
+            posts=self.write('posts.jsonl', [
+                {'id': 100 + number, 'author': 'author', 'group': 'books',
+                 'text': f'Пост {number}',
+                 'pub_date': f'2020-01-0{number + 1}T12:00:00+00:00'}
+                for number in range(5)
+            ] + [{'id': 200, 'author': 'nobody', 'text': 'Сирота'}]),
+            comments=self.write('comments.jsonl', [
+                {'post': 100, 'author': 'reader', 'text': 'Комментарий'},
+                {'post': 999, 'author': 'reader', 'text': 'Мимо'},
+            ]),
+            follows=self.write('follows.csv', [
+                {'user': 'reader', 'author': 'author'},
+                {'user': 'author', 'author': 'author'},
+            ]),
+            chunk_size=2,
+            stdout=out,
+        )
+        self.assertIn('posts: записано 5, пропущено 1', out.getvalue())
+        author = User.objects.get(username='author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(
+            Post.objects.get(pk=104).pub_date.isoformat(),
+            '2020-01-05T12:00:00+00:00'
+        )
+        self.assertEqual(
+            Group.objects.get(slug='books').posts.count(), 5
+        )
+        self.assertEqual(Comment.objects.get().post_id, 100)
+        self.assertEqual(Follow.objects.get().author, author)
+        self.assertEqual(
+            Timeline.objects.filter(user__username='reader').count(), 5
+        )
+        self.assertEqual(AuthorStats.objects.get(user=author).posts_count, 5)
+
+    def test_overflowing_key_map_keeps_chunk_keys(self):
+        for username in ('first', 'second', 'third'):
+            User.objects.create_user(username=username)
+        maps = bulk.key_maps()
+        maps['users'].limit = 2
+        written, skipped = bulk.import_rows('follows', [
+            {'user': 'first', 'author': 'second'},
+            {'user': 'second', 'author': 'third'},
+        ], maps, chunk_size=1)
+        self.assertEqual((written, skipped), (2, 0))
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_reimport_is_idempotent(self):
+        users = self.write('users.jsonl', [{'username': 'existing'}])
+        out = StringIO()
+        call_command('import_content', users=users, stdout=out)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertIn('users: записано 0, пропущено 1', out.getvalue())
+
+    def test_colliding_post_id_gets_new_pk(self):
+        other = Post.objects.create(
+            author=User.objects.get(username='existing'), text='Чужой пост'
+        )
+        files = {
+            'users': self.write('users.jsonl', [{'username': 'author'}]),
+            'posts': self.write('posts.jsonl', [
+                {'id': other.pk, 'author': 'author', 'text': 'Импорт',
+                 'pub_date': '2020-01-01T12:00:00+00:00'},
+            ]),
+            'comments': self.write('comments.jsonl', [
+                {'post': other.pk, 'author': 'author', 'text': 'Ответ'},
+            ]),
+        }
+        out = StringIO()
+        call_command('import_content', stdout=out, **files)
+        self.assertIn('posts: записано 1, пропущено 0', out.getvalue())
+        imported = Post.objects.get(text='Импорт')
+        self.assertNotEqual(imported.pk, other.pk)
+        self.assertEqual(Comment.objects.get().post, imported)
+        out = StringIO()
+        call_command('import_content', posts=files['posts'], stdout=out)
+        self.assertIn('posts: записано 0, пропущено 1', out.getvalue())
+        self.assertEqual(Post.objects.filter(text='Импорт').count(), 1)
+
+
+class ExportContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Книги', slug='books', description='Про книги'
+        )
+        Post.objects.create(author=cls.user, group=cls.group, text='Мой пост')
+        Post.objects.create(author=cls.other, text='Чужой, пост')
+
+    def test_user_export_streams_own_posts(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:export', args=['posts', 'jsonl'])
+        )
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual([row['text'] for row in rows], ['Мой пост'])
+        self.assertEqual(rows[0]['group'], 'books')
+
+    def test_site_export_is_for_staff(self):
+        url = reverse('posts:export_all', args=['posts', 'csv'])
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        content = b''.join(
+            self.client.get(url).streaming_content
+        ).decode()
+        self.assertTrue(content.startswith('id,author,group,text'))
+        self.assertIn('"Чужой, пост"', content)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:export_all', args=['secrets', 'csv'])
+            ).status_code,
+            404
+        )
+
+    def test_command_output_can_be_imported(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        call_command(
+            'export_content', format='csv', output_dir=directory,
+            stdout=StringIO()
+        )
+        Post.objects.all().delete()
+        call_command(
+            'import_content',
+            posts=os.path.join(directory, 'posts.csv'),
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', 'group__slug')),
+            [('Мой пост', 'books'), ('Чужой, пост', None)]
+        )
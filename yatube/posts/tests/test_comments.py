@@ -0,0 +1,59 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from posts.settings import COUNT_COMMENTS_ON_PAGE
+
+USER = 'Vlad0n4uk'
+COUNT_COMMENTS = COUNT_COMMENTS_ON_PAGE * 2 + 5
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        cls.post = Post.objects.create(author=cls.user, text='Вирусный пост')
+        commenters = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(5)
+        ]
+        Comment.objects.bulk_create(Comment(
+            post=cls.post,
+            author=commenters[number % len(commenters)],
+            text=f'Комментарий {number}',
+        ) for number in range(COUNT_COMMENTS))
+        cls.guest = Client()
+        cls.detail_url = reverse('posts:post_detail', args=(cls.post.pk,))
+        cls.comments_url = reverse('posts:post_comments', args=(cls.post.pk,))
+
+    def test_post_detail_shows_first_page(self):
+        response = self.guest.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COUNT_COMMENTS_ON_PAGE)
+        self.assertContains(response, 'data-comments-url')
+
+    def test_partial_pages_cover_all_comments(self):
+        seen = []
+        url = self.comments_url
+        while True:
+            with self.assertNumQueries(2):
+                response = self.guest.get(url)
+                comments = response.context['comments']
+                seen += [comment.pk for comment in comments]
+                next_cursor = str(comments.next_cursor)
+            self.assertNotContains(response, '<html')
+            if not next_cursor:
+                break
+            url = f'{self.comments_url}?cursor={next_cursor}'
+        self.assertEqual(
+            seen,
+            list(self.post.comments.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        )
+
+    def test_comments_of_missing_post(self):
+        response = self.guest.get(
+            reverse('posts:post_comments', args=(self.post.pk + 1,))
+        )
+        self.assertEqual(response.status_code, 404)
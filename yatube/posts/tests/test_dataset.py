@@ -0,0 +1,49 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDatasetTests(TransactionTestCase):
+    # Снимок делается вне транзакции, поэтому не TestCase
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_dataset_and_snapshot(self):
+        snapshot = os.path.join(TEMP_MEDIA_ROOT, 'snapshot.sqlite3')
+        call_command(
+            'generate_dataset', users=30, groups=3, posts=200, comments=100,
+            follows=300, images=2, seed=1, snapshot=snapshot,
+            stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(
+            Post.objects.exclude(image='').values('image').distinct().count(),
+            2
+        )
+        # Степенной закон: у первого автора больше всех подписчиков
+        top = AuthorStats.objects.order_by('-followers_count').first()
+        self.assertEqual(
+            top.followers_count,
+            Follow.objects.filter(author=top.user).count()
+        )
+        self.assertGreater(top.followers_count, 300 / 30)
+        with sqlite3.connect(snapshot) as db:
+            self.assertEqual(
+                db.execute('SELECT COUNT(*) FROM posts_post').fetchone(),
+                (200,)
+            )
@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..paginator import CursorPaginator, NEXT, PREVIOUS, encode_cursor
+from posts.settings import COUNT_POST_ON_PAGE
+
+USER = 'Vlad0n4uk'
+COUNT_POSTS = COUNT_POST_ON_PAGE * 2 + 3
+INDEX_URL = reverse('posts:index')
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        # bulk_create дает почти одинаковые pub_date: порядок держит id
+        Post.objects.bulk_create(Post(
+            author=cls.user,
+            text=f'Тестовый пост {number}',
+        ) for number in range(COUNT_POSTS))
+        cls.guest = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self):
+        return CursorPaginator(Post.objects.all(), COUNT_POST_ON_PAGE)
+
+    def test_pages_cover_feed_without_gaps(self):
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+        seen = []
+        page = self.paginator().get_cursor_page()
+        self.assertEqual(page.previous_cursor, '')
+        while True:
+            seen += [post.pk for post in page]
+            if not page.next_cursor:
+                break
+            page = self.paginator().get_cursor_page(page.next_cursor)
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        first = self.paginator().get_cursor_page()
+        second = self.paginator().get_cursor_page(first.next_cursor)
+        back = self.paginator().get_cursor_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertEqual(back.previous_cursor, '')
+
+    def test_page_is_built_in_one_query(self):
+        first = self.paginator().get_cursor_page()
+        page = self.paginator().get_cursor_page(first.next_cursor)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(page), COUNT_POST_ON_PAGE)
+            self.assertTrue(page.next_cursor)
+
+    def test_broken_cursor_gives_first_page(self):
+        first = list(self.paginator().get_cursor_page())
+        for cursor in [
+            'мусор', 'e30', encode_cursor(NEXT, [1]),
+            encode_cursor(NEXT, ['notadate', 1]),
+            encode_cursor(NEXT, [{'a': 1}, 1]),
+            encode_cursor(PREVIOUS, ['2020-01-01T00:00:00+00:00', 'id']),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(
+                    list(self.paginator().get_cursor_page(cursor)), first
+                )
+
+    def test_tampered_cursor_does_not_break_feeds(self):
+        cursor = encode_cursor(NEXT, ['notadate', 1])
+        for url in (INDEX_URL, reverse('posts:search')):
+            with self.subTest(address=url):
+                response = self.guest.get(url, {'cursor': cursor, 'q': 'x'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['page_obj'].cursor, '')
+        response = self.guest.get(reverse('api:index'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_views_render_cursor_links(self):
+        response = self.guest.get(INDEX_URL)
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+        response = self.guest.get(INDEX_URL, {'cursor': next_cursor})
+        self.assertEqual(
+            len(response.context['page_obj']), COUNT_POST_ON_PAGE
+        )
+        self.assertTrue(response.context['page_obj'].previous_cursor)
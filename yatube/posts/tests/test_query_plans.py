@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..paginator import NEXT, PREVIOUS, encode_cursor
+
+AUTHOR = 'author'
+SLUG = 'group'
+
+
+def explain(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' / '.join(row[-1] for row in cursor.fetchall())
+
+
+class QueryPlanTests(TestCase):
+    """Каждый запрос ленты идет по своему индексу и без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug=SLUG, description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.cursors = {
+            direction: encode_cursor(
+                direction, [cls.post.pub_date, cls.post.pk]
+            )
+            for direction in (NEXT, PREVIOUS)
+        }
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assertFeedPlans(self, url, table, index):
+        """Все запросы страниц ленты к table используют index."""
+        for cursor in ('', *self.cursors.values()):
+            with self.subTest(url=url, cursor=cursor):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url, {'cursor': cursor} if cursor else {})
+                plans = [
+                    explain(query['sql'])
+                    for query in queries.captured_queries
+                    if f'FROM "{table}"' in query['sql']
+                    and 'ORDER BY' in query['sql']
+                ]
+                self.assertTrue(plans)
+                for plan in plans:
+                    self.assertIn(f'INDEX {index}', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_index_feed(self):
+        self.assertFeedPlans(
+            reverse('posts:index'), 'posts_post', 'posts_post_pub_date'
+        )
+
+    def test_group_feed(self):
+        for url in (reverse('posts:group_list', args=(SLUG,)),
+                    reverse('api:group_list', args=(SLUG,))):
+            self.assertFeedPlans(url, 'posts_post', 'post_group_feed_idx')
+
+    def test_profile_feed(self):
+        for url in (reverse('posts:profile', args=(AUTHOR,)),
+                    reverse('api:profile', args=(AUTHOR,))):
+            self.assertFeedPlans(url, 'posts_post', 'post_author_feed_idx')
+
+    def test_comments(self):
+        for url in (
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('posts:post_comments', args=(self.post.pk,)),
+            reverse('api:post_comments', args=(self.post.pk,)),
+        ):
+            self.assertFeedPlans(
+                url, 'posts_comment', 'comment_post_feed_idx'
+            )
+
+    def test_follow_feed(self):
+        for url in (reverse('posts:follow_index'),
+                    reverse('api:follow_index')):
+            self.assertFeedPlans(url, 'posts_post', 'timeline_feed_idx')
+
+    def test_follows_of_user(self):
+        sql, params = Follow.objects.filter(user=self.reader).values_list(
+            'author', flat=True
+        ).query.sql_with_params()
+        self.assertIn(
+            'COVERING INDEX follow_user_author_idx', explain(sql, params)
+        )
+
+    def test_author_backfill(self):
+        sql, params = Post.objects.filter(author=self.author).order_by(
+            '-pub_date'
+        ).values_list('pk', 'pub_date').query.sql_with_params()
+        plan = explain(sql, params)
+        self.assertIn('INDEX post_author_feed_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,79 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..paginator import CursorPaginator
+from posts.settings import SEARCH_KEYS
+
+USER = 'Vlad0n4uk'
+SEARCH_URL = reverse('posts:search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        cls.best = Post.objects.create(
+            author=cls.user, text='Кот и снова кот: коты <script> повсюду'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Длинный рассказ о погоде, где кот '
+            'встречается лишь однажды среди множества других слов'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Собака номер {number}')
+            for number in range(15)
+        )
+        cls.guest = Client()
+
+    def found(self, query):
+        return list(Post.objects.search(query).values_list('pk', flat=True))
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.found('Кот'), [self.best.pk, self.other.pk])
+        self.assertEqual(self.found('кот погоде'), [self.other.pk])
+        self.assertEqual(self.found('"кот ('), self.found('кот'))
+        self.assertEqual(self.found('   '), [])
+
+    def test_index_follows_writes(self):
+        self.other.text = 'Теперь про ежа'
+        self.other.save()
+        self.assertEqual(self.found('кот'), [self.best.pk])
+        self.assertEqual(self.found('ежа'), [self.other.pk])
+        Post.objects.filter(pk=self.best.pk).delete()
+        self.assertEqual(self.found('кот'), [])
+
+    def test_keyset_pagination_over_ranks(self):
+        paginator = CursorPaginator(
+            Post.objects.search('собака'), 4, keys=SEARCH_KEYS
+        )
+        seen = []
+        page = paginator.get_cursor_page()
+        while True:
+            seen += [post.pk for post in page]
+            if not page.next_cursor:
+                break
+            page = paginator.get_cursor_page(page.next_cursor)
+        self.assertEqual(seen, self.found('собака'))
+        self.assertEqual(len(seen), 15)
+
+    def test_search_page_highlights_snippet(self):
+        response = self.guest.get(SEARCH_URL, {'q': 'кот'})
+        self.assertContains(response, '<mark>Кот</mark>')
+        self.assertContains(response, '&lt;script&gt;')
+        self.assertNotContains(response, '<script> повсюду')
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'погоде'}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.other.pk]
+        )
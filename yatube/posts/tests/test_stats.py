@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+AUTHOR = 'author'
+FOLLOWER = 'follower'
+PROFILE_URL = reverse('posts:profile', args=[AUTHOR])
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        Comment.objects.create(
+            text='Комментарий', author=cls.author, post=cls.post
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        cls.guest = Client()
+
+    def counters(self, user):
+        stats = AuthorStats.objects.get(user=user)
+        return [getattr(stats, name) for name in AuthorStats.COUNTERS]
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(self.counters(self.author), [1, 1, 0, 1])
+        self.assertEqual(self.counters(self.follower), [0, 0, 1, 0])
+        Post.objects.create(text='Еще пост', author=self.author)
+        Follow.objects.filter(user=self.follower).delete()
+        self.assertEqual(self.counters(self.author), [2, 0, 0, 1])
+        self.assertEqual(self.counters(self.follower), [0, 0, 0, 0])
+        self.post.delete()
+        self.assertEqual(self.counters(self.author), [1, 0, 0, 0])
+
+    def test_reconcile_fixes_drift(self):
+        AuthorStats.objects.filter(user=self.author).update(
+            posts_count=100, comments_count=0
+        )
+        AuthorStats.objects.filter(user=self.follower).delete()
+        out = StringIO()
+        call_command('reconcile_author_stats', batch_size=1, stdout=out)
+        self.assertIn('исправлено: 2', out.getvalue())
+        self.assertEqual(self.counters(self.author), [1, 1, 0, 1])
+        self.assertEqual(self.counters(self.follower), [0, 0, 1, 0])
+
+    def test_profile_reads_stats(self):
+        response = self.guest.get(PROFILE_URL)
+        self.assertEqual(response.context['stats'].posts_count, 1)
+        self.assertContains(response, 'Всего постов: 1')
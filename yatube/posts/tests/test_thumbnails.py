@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.models import KVStore
+
+from .. import thumbnails
+from ..models import Post, User
+
+USER = 'Vlad0n4uk'
+INDEX_URL = reverse('posts:index')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER)
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='thumb.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        cls.guest = Client()
+        cls.author = Client()
+        cls.author.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_shows_placeholder_until_thumbnail_exists(self):
+        response = self.guest.get(INDEX_URL)
+        self.assertNotContains(response, settings.MEDIA_URL)
+        self.assertContains(response, 'aspect-ratio')
+        thumbnails.generate(self.post.image.name)
+        thumbnail = thumbnails.cached(self.post.image, 'card')
+        self.assertIsNotNone(thumbnail)
+        # Без очистки кеша: генерация сама сбрасывает фрагмент с заглушкой
+        self.assertContains(
+            self.guest.get(INDEX_URL), f'<img src="{thumbnail.url}"'
+        )
+
+    def test_cards_list_every_variant_width(self):
+        thumbnails.generate(self.post.image.name)
+        picture = thumbnails.picture(self.post.image, 'card')
+        for width in (320, 640, 960):
+            self.assertIn(f' {width}w', picture['srcset'])
+        self.assertEqual(
+            [source['type'] for source in picture['sources']],
+            [f'image/{format_.lower()}' for format_ in thumbnails.FORMATS]
+        )
+        response = self.guest.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertContains(response, f'srcset="{picture["srcset"]}"')
+        self.assertContains(response, 'sizes="(min-width: 768px) 25vw')
+
+    def test_generate_thumbnails_command(self):
+        out = StringIO()
+        call_command('generate_thumbnails', workers=0, stdout=out)
+        self.assertIn('изображений: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.cached(self.post.image, 'card'))
+
+    def test_post_create_schedules_thumbnails(self):
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            with mock.patch(
+                'django.db.transaction.on_commit', lambda func: func()
+            ):
+                self.author.post(reverse('posts:post_create'), {
+                    'text': 'Новый пост',
+                    'image': SimpleUploadedFile(
+                        name='new.gif', content=SMALL_GIF,
+                        content_type='image/gif'
+                    ),
+                })
+        schedule.assert_called_once_with('posts/new.gif')
+
+    def test_kvstore_keeps_compact_records(self):
+        thumbnails.generate(self.post.image.name)
+        self.assertTrue(
+            KVStore.objects.filter(value='["posts/thumb.gif",2,1]').exists()
+        )
+        self.assertEqual(
+            len(list(default.kvstore._find_keys(identity='thumbnails'))), 1
+        )
+
+    def test_cleanup_media_removes_orphans(self):
+        orphan = Post.objects.create(
+            text='Удаляемый пост',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='orphan.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        call_command('generate_thumbnails', workers=0, stdout=StringIO())
+        kept = thumbnails.cached(self.post.image, 'card')
+        removed = thumbnails.cached(orphan.image, 'card')
+        storage = orphan.image.storage
+        name = orphan.image.name
+        orphan.delete()
+        stray = default.storage.save('cache/00/00/stray.jpg', ContentFile(b''))
+        out = StringIO()
+        call_command('cleanup_media', grace=0, dry_run=True, stdout=out)
+        self.assertIn('Будет удалено: исходников в kvstore 1', out.getvalue())
+        self.assertTrue(removed.exists())
+        # Пачки по одному: ссылки и файлы проверяются пачками при обходе
+        out = StringIO()
+        call_command('cleanup_media', grace=0, batch_size=1, stdout=out)
+        self.assertIn(
+            'исходников в kvstore 1, файлов миниатюр 1, оригиналов 1',
+            out.getvalue()
+        )
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(removed.exists())
+        self.assertFalse(default.storage.exists(stray))
+        self.assertTrue(kept.exists())
+        self.assertTrue(storage.exists(self.post.image.name))
+        cache.clear()
+        self.assertIsNotNone(thumbnails.cached(self.post.image, 'card'))
+        self.assertEqual(
+            len(list(default.kvstore._find_keys(identity='thumbnails'))), 1
+        )
@@ -0,0 +1,65 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import timelines
+from ..models import Follow, Post, Timeline, User
+
+AUTHOR = 'author'
+FOLLOWER = 'follower'
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR)
+        cls.follower = User.objects.create_user(username=FOLLOWER)
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def timeline_posts(self):
+        return set(Post.objects.timeline(self.follower))
+
+    def test_follow_backfills_and_post_fans_out(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.timeline_posts(), {self.old_post})
+        new_post = Post.objects.create(
+            text='Пост после подписки',
+            author=self.author,
+        )
+        self.assertEqual(self.timeline_posts(), {self.old_post, new_post})
+
+    def test_follow_backfills_whole_history(self):
+        Post.objects.bulk_create([
+            Post(text=f'Старый пост {number}', author=self.author)
+            for number in range(5)
+        ])
+        with mock.patch.object(timelines, 'TIMELINE_BATCH_SIZE', 2):
+            Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(
+            self.timeline_posts(),
+            set(Post.objects.filter(author=self.author))
+        )
+
+    def test_unfollow_trims_timeline(self):
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        follow.delete()
+        self.assertEqual(self.timeline_posts(), set())
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        Timeline.objects.all().delete()
+        # bulk_create не шлет сигналы, такие посты подхватит пересборка
+        Post.objects.bulk_create([
+            Post(text='Пост без сигнала', author=self.author)
+        ])
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(
+            self.timeline_posts(),
+            set(Post.objects.filter(author=self.author))
+        )
@@ -4,10 +4,15 @@ import tempfile
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Follow, Group, Post, User
+from .. import feed_cache
+from ..models import Comment, Follow, Group, Post, User
 from posts.settings import COUNT_POST_ON_PAGE
 
 COUNT_LAST_PAGE_POSTS = 3
@@ -123,7 +128,8 @@ class ViewsTests(TestCase):
 
     def test_index_page_cache(self):
         first_content = self.authorized_client.get(INDEX_URL).content
-        Post.objects.all().delete()
+        # update() не шлет сигналов: лента остается в кеше
+        Post.objects.all().update(text='Текст в обход сигналов')
         self.assertEqual(
             first_content,
             (self.authorized_client.get(INDEX_URL).content)
@@ -134,6 +140,90 @@ class ViewsTests(TestCase):
             (self.authorized_client.get(INDEX_URL).content)
         )
 
+    def test_feed_cache_invalidated_by_writes(self):
+        urls = [INDEX_URL, GROUP_URL, PROFILE_URL]
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Свежий пост',
+            author=self.user,
+            group=self.group,
+        )
+        for url in urls:
+            with self.subTest(address=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_feed_cache_invalidated_by_group_and_author_changes(self):
+        urls = [INDEX_URL, GROUP_URL, PROFILE_URL]
+        for url in urls:
+            self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название группы'
+        group.save()
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        for url in urls:
+            with self.subTest(address=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Новое Имя')
+                self.assertContains(response, 'Новое название группы')
+
+    def test_cached_index_skips_database(self):
+        self.guest_client.get(INDEX_URL)
+        with self.assertNumQueries(0):
+            self.guest_client.get(INDEX_URL)
+
+    def test_unchanged_pages_are_not_rendered(self):
+        urls = [INDEX_URL, GROUP_URL, PROFILE_URL, self.POST_DETAIL_URL]
+        for url in urls:
+            with self.subTest(address=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.content)
+                self.assertNotEqual(
+                    self.authorized_client.get(url)['ETag'], etag
+                )
+
+    def test_writes_change_etag(self):
+        etags = {
+            url: self.guest_client.get(url)['ETag']
+            for url in (PROFILE_URL, self.POST_DETAIL_URL)
+        }
+        Comment.objects.create(
+            post=self.post, author=self.follower, text='Новый комментарий'
+        )
+        Follow.objects.create(user=self.follower, author=self.user)
+        for url, etag in etags.items():
+            with self.subTest(address=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_follower_profile_etag_changes(self):
+        url = reverse('posts:profile', args=[FOLLOWER])
+        writes = {
+            'подписка': lambda: Follow.objects.create(
+                user=self.follower, author=self.user
+            ),
+            'комментарий': lambda: Comment.objects.create(
+                post=self.post, author=self.follower, text='Комментарий'
+            ),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                etag = self.guest_client.get(url)['ETag']
+                write()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
     def test_follow_posts(self):
         Follow.objects.create(user=self.follower,
                               author=self.user)
@@ -207,3 +297,48 @@ class ViewsTests(TestCase):
                     len(self.auth_follower.get(url).context['page_obj']),
                     count
                 )
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        self.auth_follower.get(FOLLOW_URL)
+        urls = [INDEX_URL, GROUP_URL, PROFILE_URL, FOLLOW_INDEX_URL]
+        few = {}
+        for url in urls:
+            # Прогревочный запрос, считаем запросы со второго
+            cache.clear()
+            self.auth_follower.get(url)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.auth_follower.get(url)
+            few[url] = len(queries)
+        Post.objects.bulk_create(Post(
+            author=self.user,
+            text=f'Тестовый пост {post_number}',
+            group=self.group
+        ) for post_number in range(COUNT_POST_ON_PAGE - 1))
+        for url in urls:
+            with self.subTest(address=url):
+                cache.clear()
+                with self.assertNumQueries(few[url]):
+                    self.auth_follower.get(url)
+
+
+class FeedCacheCommitTests(TransactionTestCase):
+    def index_fragment_key(self):
+        # Ключ фрагмента первой страницы index.html
+        return make_template_fragment_key(
+            'index_page', [feed_cache.versions('index'), None, '']
+        )
+
+    def test_fragment_cached_before_commit_is_replaced(self):
+        cache.clear()
+        author = User.objects.create_user(username=USER)
+        guest = Client()
+        guest.get(INDEX_URL)
+        stale = cache.get(self.index_fragment_key())
+        self.assertIsNotNone(stale)
+        with transaction.atomic():
+            Post.objects.create(text='Пост из транзакции', author=author)
+            # Параллельный читатель уже видит новую версию, но еще
+            # не видит пост и кеширует под ней старый фрагмент
+            cache.set(self.index_fragment_key(), stale, None)
+        self.assertContains(guest.get(INDEX_URL), 'Пост из транзакции')
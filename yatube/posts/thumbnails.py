@@ -0,0 +1,252 @@
+"""
+Миниатюры постов готовятся заранее в пуле процессов, а не в запросе,
+который первым их показал. Шаблоны только читают готовые миниатюры
+из kvstore sorl и до их появления показывают заглушку.
+
+Каждый размер режется в несколько ширин для srcset: в формате
+оригинала и в современных форматах из THUMBNAIL_FORMATS.
+"""
+import logging
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+import django
+from django.db import connections
+from django.utils import timezone
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from posts import feed_cache
+from posts.models import Post
+from posts.settings import (THUMBNAIL_FORMATS, THUMBNAIL_LAYOUT,
+                            THUMBNAIL_SIZES, THUMBNAIL_WIDTHS,
+                            THUMBNAIL_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+# Форматы, которые умеет сохранять установленный Pillow
+FORMATS = tuple(
+    format_ for format_ in THUMBNAIL_FORMATS if features.check(format_.lower())
+)
+
+_executor = None
+
+
+class CachedThumbnailBackend(ThumbnailBackend):
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        """Как get_thumbnail, но только ищет миниатюру в kvstore."""
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = CachedThumbnailBackend()
+
+
+def variants(size):
+    """Варианты размера: (формат, геометрия, опции sorl).
+
+    Формат None — формат оригинала; вариант полной ширины в нем
+    совпадает с самим размером и служит запасным <img>.
+    """
+    geometry, options = THUMBNAIL_SIZES[size]
+    width, height = map(int, geometry.split('x'))
+    return [
+        (format_, f'{variant}x{round(height * variant / width)}',
+         dict(options, format=format_) if format_ else options)
+        for format_ in (None, *FORMATS)
+        for variant in THUMBNAIL_WIDTHS.get(size, (width,))
+    ]
+
+
+def cached(image, size):
+    """Готовая миниатюра размера из THUMBNAIL_SIZES или None."""
+    geometry, options = THUMBNAIL_SIZES[size]
+    return backend.get_cached_thumbnail(image, geometry, **options)
+
+
+def picture(image, size):
+    """Готовые варианты размера для <picture> или None.
+
+    None, пока нет основной миниатюры; еще не готовые варианты
+    просто не попадают в srcset.
+    """
+    fallback = cached(image, size)
+    if fallback is None:
+        return None
+    srcsets = {}
+    for format_, geometry, options in variants(size):
+        thumbnail = backend.get_cached_thumbnail(image, geometry, **options)
+        if thumbnail is not None:
+            srcsets.setdefault(format_, []).append(
+                f'{thumbnail.url} {thumbnail.width}w'
+            )
+    return {
+        'img': fallback,
+        'srcset': ', '.join(srcsets.pop(None, ())),
+        'sources': [
+            {'type': f'image/{format_.lower()}', 'srcset': ', '.join(srcset)}
+            for format_, srcset in srcsets.items()
+        ],
+        'sizes': THUMBNAIL_LAYOUT.get(size, '100vw'),
+    }
+
+
+def generate(name):
+    """Создает все миниатюры, которые используют шаблоны."""
+    for size in THUMBNAIL_SIZES:
+        for _, geometry, options in variants(size):
+            get_thumbnail(name, geometry, **options)
+    invalidate_pages(name)
+    return name
+
+
+def invalidate_pages(name):
+    """Сбрасывает фрагменты лент, закешированные с заглушкой.
+
+    Фрагменты живут без таймаута: без новой версии областей поста
+    заглушка осталась бы в ленте и после появления миниатюры.
+    """
+    for post in Post.objects.filter(image=name).only('author', 'group'):
+        feed_cache.bump(*feed_cache.post_scopes(post))
+
+
+def _init_worker():
+    django.setup()
+    # Соединения с БД родителя после fork использовать нельзя
+    connections.close_all()
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error(
+            'Не удалось создать миниатюры', exc_info=future.exception()
+        )
+
+
+def _generate_quietly(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return False
+    return True
+
+
+def schedule(name):
+    """Ставит создание миниатюр изображения в очередь пула."""
+    global _executor
+    if not THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS, initializer=_init_worker
+        )
+    _executor.submit(generate, name).add_done_callback(_log_failure)
+
+
+def generate_all(names, workers, batch_size=1000):
+    """Создает миниатюры пачками, возвращает число успешных изображений."""
+    names = iter(names)
+    if not workers:
+        return sum(map(_generate_quietly, names))
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker
+    ) as pool:
+        for batch in iter(lambda: list(islice(names, batch_size)), []):
+            done += sum(pool.map(_generate_quietly, batch, chunksize=16))
+    return done
+
+
+def referenced(names):
+    """Имена из names, на которые ссылаются посты."""
+    return set(Post.objects.filter(image__in=names).values_list(
+        'image', flat=True
+    ))
+
+
+def collect_garbage(batch_size, dry_run=False):
+    """Удаляет миниатюры изображений, на которые не ссылаются посты.
+
+    Ссылки проверяются по пачке исходников, без списка всех изображений
+    в памяти. Возвращает имена миниатюр удаленных исходников и их число.
+    """
+    doomed = set()
+    removed = 0
+    for batch in default.kvstore.sources(batch_size):
+        live = referenced(
+            source.name for _, source, _ in batch if source is not None
+        )
+        keys = []
+        for key, source, thumbnails in batch:
+            if source is not None and source.name in live:
+                continue
+            removed += 1
+            keys += [add_prefix(key), add_prefix(key, 'thumbnails')]
+            keys += [add_prefix(thumbnail) for thumbnail in thumbnails]
+            for thumbnail in thumbnails.values():
+                if thumbnail is None:
+                    continue
+                doomed.add(thumbnail.name)
+                if not dry_run:
+                    thumbnail.delete()
+        if keys and not dry_run:
+            default.kvstore._delete_raw(*keys)
+    return doomed, removed
+
+
+def live_thumbnails(names, doomed=()):
+    """Имена из names, записи которых остались в kvstore."""
+    keys = {ImageFile(name, default.storage).key: name for name in names}
+    return {
+        keys[key] for key in default.kvstore.existing(keys)
+        if keys[key] not in doomed
+    }
+
+
+def walk(storage, path):
+    """Имена всех файлов каталога хранилища, рекурсивно."""
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def delete_files(storage, path, live, grace, batch_size, dry_run=False):
+    """Удаляет файлы каталога, не менявшиеся grace секунд.
+
+    live(names) возвращает нужные из пачки имен: файлы проверяются
+    пачками по мере обхода хранилища.
+    """
+    deadline = timezone.now() - timedelta(seconds=grace)
+    removed = 0
+    names = walk(storage, path)
+    for batch in iter(lambda: list(islice(names, batch_size)), []):
+        keep = live(batch)
+        for name in batch:
+            if name in keep or storage.get_modified_time(name) > deadline:
+                continue
+            if not dry_run:
+                storage.delete(name)
+            removed += 1
+    return removed
@@ -0,0 +1,61 @@
+"""
+Fan-out-on-write: лента подписок хранится готовой в таблице Timeline.
+Новый пост раскладывается подписчикам автора при сохранении,
+подписка добавляет все посты автора, отписка их убирает.
+"""
+from django.db import transaction
+
+from .models import Follow, Post, Timeline
+from posts.settings import TIMELINE_BATCH_SIZE
+
+
+def _insert(entries):
+    Timeline.objects.bulk_create(
+        entries, batch_size=TIMELINE_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Кладет пост в ленты всех подписчиков его автора."""
+    _insert(
+        Timeline(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора.
+
+    Лента подписок показывает всю историю авторов, поэтому посты
+    не обрезаются, а читаются потоком пачками.
+    """
+    _insert(
+        Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in Post.objects.filter(
+            author_id=author_id
+        ).order_by().values_list(
+            'pk', 'pub_date'
+        ).iterator(chunk_size=TIMELINE_BATCH_SIZE)
+    )
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild():
+    """Пересобирает все ленты с нуля, возвращает число подписок."""
+    with transaction.atomic():
+        Timeline.objects.all().delete()
+        follows = 0
+        for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id'
+        ).iterator():
+            backfill(user_id, author_id)
+            follows += 1
+    return follows
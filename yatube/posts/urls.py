@@ -22,6 +22,18 @@ urlpatterns = [
     path('posts/<int:post_id>/',
          views.post_detail,
          name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
+    path('export/<slug:kind>.<slug:fmt>',
+         views.export,
+         name='export'),
+    path('export/all/<slug:kind>.<slug:fmt>',
+         views.export_all,
+         name='export_all'),
+    path('search/',
+         views.search,
+         name='search'),
     path('create/',
          views.post_create,
          name='post_create'),
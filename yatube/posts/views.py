@@ -1,56 +1,144 @@
+from core.db import retry_locked
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import etag
 
+from . import bulk, feed_cache, stats, thumbnails
 from .forms import PostForm, CommentForm
 from .models import Follow, Group, Post, User
-from posts.settings import (COUNT_POST_ON_PAGE, POST_CREATE_HTML,
+from .paginator import CursorPaginator
+from posts.settings import (COUNT_COMMENTS_ON_PAGE, COUNT_POST_ON_PAGE,
+                            FEED_KEYS, POST_COMMENTS_HTML, POST_CREATE_HTML,
                             POST_DETAIL_HTML, POST_EDIT_HTML,
                             POST_GROUP_LIST_HTML, POST_INDEX_HTML,
-                            POST_PROFILE_HTML)
+                            POST_PROFILE_HTML, POST_SEARCH_HTML,
+                            SEARCH_KEYS)
 
 
-def page_obj(request, post_list):
-    return Paginator(post_list, COUNT_POST_ON_PAGE).get_page(
-        request.GET.get('page'))
+def page_obj(request, post_list, keys=None):
+    paginator = CursorPaginator(post_list, COUNT_POST_ON_PAGE, keys=keys)
+    if 'page' in request.GET:
+        return paginator.get_page(request.GET.get('page'))
+    return paginator.get_cursor_page(request.GET.get('cursor'))
 
 
+def comments_page(request, post):
+    """Страница комментариев поста вместе с авторами одним запросом."""
+    comments = post.comments.select_related('author').only(
+        'text', 'pub_date', 'post', 'author__username'
+    )
+    return CursorPaginator(
+        comments, COUNT_COMMENTS_ON_PAGE
+    ).get_cursor_page(request.GET.get('cursor'))
+
+
+def schedule_thumbnails(post):
+    if post.image:
+        name = post.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+
+
+def index_etag(request):
+    return feed_cache.etag(request, 'index')
+
+
+def group_etag(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    return group_id and feed_cache.etag(request, f'group:{group_id}')
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    return author_id and feed_cache.etag(
+        request, f'author:{author_id}', f'follows:{author_id}'
+    )
+
+
+def post_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'group_id').first()
+    if post is None:
+        return None
+    scopes = [f'post:{post_id}', f'author:{post["author_id"]}']
+    if post['group_id']:
+        scopes.append(f'group:{post["group_id"]}')
+    return feed_cache.etag(request, *scopes)
+
+
+@etag(index_etag)
 def index(request):
     return render(request, POST_INDEX_HTML, {
-        'page_obj': page_obj(request, Post.objects.all()),
+        'page_obj': page_obj(request, Post.objects.feed()),
+        'feed_version': feed_cache.versions('index'),
     })
 
 
+@etag(group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, POST_GROUP_LIST_HTML, {
         'group': group,
-        'page_obj': page_obj(request, group.posts.all()),
+        'page_obj': page_obj(request, group.posts.feed()),
+        'feed_version': feed_cache.versions(f'group:{group.pk}'),
     })
 
 
+@etag(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     return render(request, POST_PROFILE_HTML, {
         'author': author,
-        'page_obj': page_obj(request, author.posts.all()),
-        'following': Follow.objects.filter(
-            user=request.user.is_authenticated,
+        'stats': stats.for_user(author),
+        'page_obj': page_obj(request, author.posts.feed()),
+        'feed_version': feed_cache.versions(f'author:{author.pk}'),
+        'following': request.user.is_authenticated and Follow.objects.filter(
+            user=request.user,
             author=author).exists()
     })
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    return render(request, POST_SEARCH_HTML, {
+        'query': query,
+        'page_obj': page_obj(
+            request, Post.objects.feed().search(query), keys=SEARCH_KEYS
+        ),
+    })
+
+
+@etag(post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
+        'stats': stats.for_user(post.author),
         'form': form,
+        'comments': comments_page(request, post),
     }
     return render(request, POST_DETAIL_HTML, context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return render(request, POST_COMMENTS_HTML, {
+        'post': post,
+        'comments': comments_page(request, post),
+    })
+
+
 @login_required
+@retry_locked
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -62,10 +150,12 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    schedule_thumbnails(post)
     return redirect('posts:profile', username=request.user)
 
 
 @login_required
+@retry_locked
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
@@ -77,6 +167,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     return render(request, POST_EDIT_HTML, {
         'form': form,
@@ -85,6 +177,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_locked
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -98,13 +191,14 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.timeline(request.user)
     return render(request, 'posts/follow.html', {
-        'page_obj': page_obj(request, posts)
+        'page_obj': page_obj(request, posts, keys=FEED_KEYS)
     })
 
 
 @login_required
+@retry_locked
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user and not Follow.objects.filter(
@@ -116,6 +210,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@retry_locked
 def profile_unfollow(request, username):
     get_object_or_404(
         Follow,
@@ -123,3 +218,28 @@ def profile_unfollow(request, username):
         author__username=username
     ).delete()
     return redirect('posts:profile', username)
+
+
+def export_response(kind, fmt, user=None):
+    if kind not in bulk.EXPORTS or fmt not in bulk.FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        bulk.export_lines(kind, fmt, user),
+        content_type=(
+            'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        ) + '; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{fmt}"'
+    )
+    return response
+
+
+@login_required
+def export(request, kind, fmt):
+    return export_response(kind, fmt, request.user)
+
+
+@staff_member_required
+def export_all(request, kind, fmt):
+    return export_response(kind, fmt)
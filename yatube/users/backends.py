@@ -0,0 +1,36 @@
+"""
+Пользователь запроса из общего кеша.
+
+AuthenticationMiddleware на каждом запросе достает пользователя сессии
+из базы. CachedModelBackend сначала смотрит в кеш и только при промахе
+идет в auth_user. Запись сбрасывается сигналами при любом сохранении
+или удалении пользователя (см. users/signals.py): смена профиля, пароля
+или last_login при входе сразу видна следующему запросу.
+QuerySet.update() сигналов не шлет: после массовой блокировки
+в админке пользователь остается в кеше до USER_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def invalidate(user_id):
+    cache.delete(cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(
+                key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+            )
+        return user if self.user_can_authenticate(user) else None
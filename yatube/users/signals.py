@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate(pk)
+    # До коммита параллельный запрос может снова закешировать старую
+    # строку (с прежним хешем пароля и is_active): сбрасываем и после
+    transaction.on_commit(lambda: invalidate(pk))
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..backends import CachedModelBackend, cache_key
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-secret-42'
+        )
+        self.backend = CachedModelBackend()
+
+    def test_second_lookup_skips_database(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_save_invalidates_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).first_name, 'Лев')
+
+    def test_inactive_user_is_not_served(self):
+        self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_password_change_logs_out_other_sessions(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('posts:index'))
+        self.user.set_password('new-secret-42')
+        self.user.save()
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_logged_in_page_skips_session_and_user_queries(self):
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:follow_index')
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get(url).status_code, 200)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('"auth_user"', tables)
+
+
+class CachedUserCommitTests(TransactionTestCase):
+    def test_user_cached_before_commit_is_dropped(self):
+        cache.clear()
+        user = User.objects.create_user(username='reader')
+        backend = CachedModelBackend()
+        with transaction.atomic():
+            stale = backend.get_user(user.pk)
+            user.is_active = False
+            user.save()
+            # Параллельный запрос еще видит старую строку и кеширует ее
+            cache.set(cache_key(user.pk), stale)
+        self.assertIsNone(backend.get_user(user.pk))
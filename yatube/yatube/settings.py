@@ -45,10 +45,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.timing.ServerTimingMiddleware',
+    'core.routers.ReplicaMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,8 +70,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны компилируются один раз на процесс; при DEBUG
+            # измененные файлы перечитываются (см. core/template_loaders.py)
+            'loaders': [
+                ('core.template_loaders.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ], DEBUG),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -88,9 +100,45 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живет между запросами, прагмы из core/db.py
+        # выполняются один раз на соединение
+        'CONN_MAX_AGE': 600,
+    },
+    # Реплика для чтения, копия default; обновляется sync_replicas
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'CONN_MAX_AGE': 600,
+    },
 }
 
+# Записи идут в default, чтения в запросах — на реплики
+# (см. core/routers.py). Пустой список — все читают из default
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+# Сколько секунд после записи пользователь читает из default
+DATABASE_STICKY_SECONDS = 15
+
+# Прагмы SQLite для каждого соединения (по умолчанию WAL,
+# synchronous=NORMAL, busy_timeout, увеличенные cache_size и mmap_size)
+# переопределяются в SQLITE_PRAGMAS, см. core/db.py
+SQLITE_WRITE_RETRIES = 5
+SQLITE_RETRY_DELAY = 0.05
+SQLITE_MAINTENANCE_INTERVAL = 60 * 60
+
+# Компилировать все шаблоны проекта при старте WSGI-воркера
+TEMPLATES_PRECOMPILE = not DEBUG
+
+
+# Сессия читается из общего кеша, а пишется и в базу: после сброса
+# кеша пользователи остаются в системе
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# request.user берется из кеша и сбрасывается при сохранении
+# пользователя (см. users/backends.py)
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -131,6 +179,11 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 STATIC_URL = '/static/'
 
+# collectstatic пишет сюда файлы с хешем в имени и их .gz/.br
+# (см. core/storage.py)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -145,11 +198,38 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # Check and save cache
+# Общий для всех воркеров хоста кеш в SQLite (см. core/cache.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'MAX_SIZE': 128 * 1024 * 1024,
+        },
     }
 }
 
+# manage.py test подменяет файл кеша временным, чтобы не очищать
+# кеш работающих воркеров (см. core/test_runner.py)
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Компактный kvstore миниатюр с поиском по индексу (см. posts/kvstore.py)
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+
+# Сжатие ответов (см. core/compression.py): уровни по типу содержимого
+# задаются в COMPRESSION_LEVELS, меньшие ответы не сжимаются, большие
+# сжимаются на самом быстром уровне
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LARGE_SIZE = 512 * 1024
+
+# Профилирование запросов (см. core/profiling.py): доля запросов
+# под cProfile (включается на время расследования, например 0.01)
+# и порог в мс, после которого сохраняется выборка стеков
+PROFILE_SAMPLE_RATE = 0
+PROFILE_SLOW_MS = 1000
+PROFILE_INTERVAL_MS = 10
+PROFILE_KEEP = 20
+
 # Actual 403 CSRF
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'